@@ -0,0 +1,190 @@
+# Benchmark every recommender on synthetic catalogs of growing size.
+#
+#   python -m benchmarks.run --sizes 10000 100000 1000000
+#   python -m benchmarks.run --sizes 10000 --compare benchmarks/results/<previous>.json
+#
+# Each recommender runs in a fresh process so peak RSS is attributable to it.
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.synthetic import GENRES, WORDS, generate_catalog
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+RECOMMENDERS = ['simple', 'genre', 'director', 'cast', 'content', 'keyword', 'semantic', 'mood']
+MOODS = ["happy", "sad", "adventurous", "scary", "dark", "mutlu", "karanlık", "büyülü"]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Realistic query mix per recommender, including misspellings for the fuzzy paths
+def sample_queries(catalog, count, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def typo(name):
+        if len(name) < 4:
+            return name
+        i = rng.integers(1, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+    directors = catalog['directors'].dropna().to_numpy()
+    cast = [name for names in catalog['cast'].dropna().sample(count, random_state=seed, replace=True)
+            for name in names.split(',')[:1]] or ['nobody']
+    titles = catalog['title'].sample(count, random_state=seed, replace=True).tolist()
+    return {
+        'simple': [None] * count,
+        'genre': [str(g).lower() for g in rng.choice(GENRES, count)],
+        'director': [typo(d) if i % 3 == 0 else d.split()[-1] if i % 3 == 1 else d
+                     for i, d in enumerate(rng.choice(directors, count))],
+        'cast': [typo(c) if i % 4 == 0 else c for i, c in enumerate(cast[:count])],
+        'content': [typo(t) if i % 5 == 0 else t for i, t in enumerate(titles)],
+        'keyword': [" ".join(rng.choice(WORDS, rng.integers(1, 3))) for _ in range(count)],
+        'semantic': [" ".join(rng.choice(WORDS, rng.integers(2, 4))) for _ in range(count)],
+        'mood': list(rng.choice(MOODS, count)),
+    }
+
+
+def run_recommender(name, snapshot_path, index_dir, queries):
+    from inka.engine import InkaEngine
+    from inka.ingest import read_snapshot
+
+    start = time.perf_counter()
+    engine = InkaEngine(read_snapshot(snapshot_path), index_dir=index_dir)
+    load_s = time.perf_counter() - start
+    loaded_rss = peak_rss_mb()
+    # The state's recommenders, not the engine's: repeated queries would otherwise time memoized results
+    method = getattr(engine.state, name)
+
+    def call(query):
+        return method() if query is None else method(query)
+
+    # The first query also builds the indexes this recommender needs
+    start = time.perf_counter()
+    call(queries[0])
+    first_query_s = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        call(query)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    return {
+        'recommender': name,
+        'queries': len(queries),
+        'load_s': round(load_s, 4),
+        'first_query_s': round(first_query_s, 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'throughput_qps': round(len(latencies) / (latencies.sum() / 1000), 2),
+        'loaded_rss_mb': round(loaded_rss, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def run_size(rows, recommenders, query_count, workdir, seed=0):
+    from inka.pipeline import ingest_csv
+
+    catalog = generate_catalog(rows, seed)
+    csv_path = os.path.join(workdir, f"movies-{rows}.csv")
+    catalog.to_csv(csv_path, index=False)
+    snapshot_path = os.path.join(workdir, f"movies-{rows}.parquet")
+    start = time.perf_counter()
+    ingest_csv(csv_path, snapshot_path, os.path.join(workdir, f"index-{rows}"))
+    ingest_s = time.perf_counter() - start
+    print(f"[{rows} satır] ingest {ingest_s:.2f}s", flush=True)
+
+    queries = sample_queries(catalog, query_count, seed)
+    del catalog
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for name in recommenders:
+        index_dir = os.path.join(workdir, f"index-{rows}")
+        with context.Pool(1) as pool:
+            result = pool.apply(run_recommender, (name, snapshot_path, index_dir, queries[name]))
+        result.update(rows=rows, ingest_s=round(ingest_s, 4))
+        results.append(result)
+        print(f"  {name:<9} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+              f"{result['throughput_qps']:>9.1f} q/s  first {result['first_query_s']:.2f}s  "
+              f"rss {result['peak_rss_mb']:.0f} MB", flush=True)
+    return results
+
+
+# Ratio of current/baseline latency per (recommender, rows); above threshold counts as a regression
+def compare(results, baseline_path, threshold=1.2):
+    with open(baseline_path) as f:
+        baseline = {(r['recommender'], r['rows']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['recommender'], result['rows']))
+        if previous is None:
+            continue
+        ratio = result['p95_ms'] / previous['p95_ms'] if previous['p95_ms'] else float('inf')
+        marker = "  <-- regresyon" if ratio > threshold else ""
+        print(f"  {result['recommender']:<9} {result['rows']:>8}  p95 {previous['p95_ms']:.2f} -> "
+              f"{result['p95_ms']:.2f} ms ({ratio:.2f}x){marker}")
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="I.N.K.A. recommender benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--recommenders', nargs='+', default=RECOMMENDERS, choices=RECOMMENDERS)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON results path (default: benchmarks/results/<version>-<time>.json)")
+    parser.add_argument('--compare', help="previous results JSON to compare p95 latency against")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='inka-bench-') as workdir:
+        for rows in args.sizes:
+            results.extend(run_size(rows, args.recommenders, args.queries, workdir, args.seed))
+
+    version = git_version()
+    report = {
+        'version': version,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{version}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Sonuçlar: {output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
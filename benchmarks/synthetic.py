@@ -0,0 +1,71 @@
+# Synthetic movie catalog with the movies_dataset.csv schema
+import numpy as np
+import pandas as pd
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama", "Family", "Fantasy",
+          "History", "Horror", "Music", "Mystery", "Romance", "Science Fiction", "TV Movie", "Thriller", "War",
+          "Western", "Biography", "Sport", "Musical"]
+LANGUAGES = ["en", "tr", "fr", "es", "de", "ja", "ko", "it", "hi", "zh"]
+FIRST_NAMES = ["Ahmet", "Ayşe", "Christopher", "Mary", "Jean", "Luc", "Nuri", "Ferzan", "Şener", "Elijah", "Christian",
+               "Kate", "Hiro", "Ingrid", "Pedro", "Sofia", "Yılmaz", "Zeynep", "Quentin", "Agnès"]
+WORDS = np.array(["love", "war", "city", "night", "family", "secret", "journey", "space", "dream", "killer", "friend",
+                  "island", "heist", "past", "future", "ghost", "revenge", "school", "king", "river", "storm",
+                  "loneliness", "butterfly", "detective", "village", "empire", "robot", "mother", "train", "music"])
+
+
+def _names(rng, prefix, size):
+    first = rng.choice(FIRST_NAMES, size)
+    return np.array([f"{f} {prefix}{i}" for i, f in enumerate(first)], dtype=object)
+
+
+# Comma-joined random picks from vocabulary; list lengths are uniform in [low, high]
+def _token_lists(rng, vocabulary, n, low, high, zipf=None):
+    counts = rng.integers(low, high + 1, n)
+    if zipf:
+        picks = (rng.zipf(zipf, counts.sum()) - 1) % len(vocabulary)
+    else:
+        picks = rng.integers(0, len(vocabulary), counts.sum())
+    tokens = vocabulary[picks]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return [",".join(tokens[offsets[i]:offsets[i + 1]]) for i in range(n)]
+
+
+def _sentences(rng, n, low, high):
+    vocabulary = np.concatenate([WORDS, np.array([f"word{i}" for i in range(5000)], dtype=object)])
+    counts = rng.integers(low, high + 1, n)
+    tokens = vocabulary[(rng.zipf(1.3, counts.sum()) - 1) % len(vocabulary)]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return [" ".join(tokens[offsets[i]:offsets[i + 1]]) for i in range(n)]
+
+
+def generate_catalog(n, seed=0):
+    rng = np.random.default_rng(seed)
+    keywords = np.array([f"keyword{i}" for i in range(max(n // 10, 100))] + list(WORDS), dtype=object)
+    cast = _names(rng, "Actor", max(n // 2, 100))
+    directors = _names(rng, "Director", max(n // 20, 50))
+    titles = np.array([f"Movie {i}" for i in range(n)], dtype=object)
+    languages = rng.choice(LANGUAGES, n, p=[0.55] + [0.05] * 9)
+    original_titles = np.where(languages == "en", titles, [f"Film {i}" for i in range(n)])
+    years = rng.integers(1920, 2025, n)
+    df = pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'title': titles,
+        'original_title': original_titles,
+        'original_language': languages,
+        'release_date': [f"{y}-{m:02d}-{d:02d}" for y, m, d in zip(years, rng.integers(1, 13, n), rng.integers(1, 29, n))],
+        'genres': _token_lists(rng, np.array(GENRES, dtype=object), n, 1, 3),
+        'keywords': _token_lists(rng, keywords, n, 0, 8, zipf=1.5),
+        'overview': _sentences(rng, n, 20, 60),
+        'tagline': _sentences(rng, n, 0, 8),
+        'backdrop_path': [f"/{i:07d}.jpg" for i in range(n)],
+        'numVotes': np.floor(rng.lognormal(6, 2, n)),
+        'averageRating': np.round(rng.normal(6.3, 1.2, n).clip(1, 10), 1),
+        'popularity': rng.lognormal(1.5, 1.2, n),
+        'directors': directors[(rng.zipf(1.4, n) - 1) % len(directors)],
+        'cast': _token_lists(rng, cast, n, 0, 8, zipf=1.3),
+    })
+    # Sprinkle missing values the way the real dump has them
+    for column, rate in [('keywords', 0.2), ('tagline', 0.4), ('backdrop_path', 0.1), ('numVotes', 0.05),
+                         ('averageRating', 0.05), ('directors', 0.03), ('cast', 0.05)]:
+        df.loc[rng.random(n) < rate, column] = None
+    return df
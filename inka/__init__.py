@@ -0,0 +1,9 @@
+__all__ = ['InkaEngine']
+
+
+# Imported on first use so CLI modules (python -m inka.ingest) stay light
+def __getattr__(name):
+    if name == 'InkaEngine':
+        from .engine import InkaEngine
+        return InkaEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
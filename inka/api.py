@@ -0,0 +1,218 @@
+# HTTP/JSON API over InkaEngine.
+#
+#   uvicorn inka.api:app --workers 4
+#   gunicorn inka.api:app -k uvicorn.workers.UvicornWorker -w 4 --preload
+#
+# Every worker process loads one catalog at startup. Set INKA_SNAPSHOT to a local Parquet
+# snapshot to serve it without touching the network, or INKA_SHARED_DIR to memory-map the catalog
+# published by inka.shared so all workers share one copy and pick up new versions without a restart.
+# POST /catalog/delta applies a delta CSV (see inka.ingest.parse_delta) when the X-Inka-Token
+# header matches INKA_ADMIN_TOKEN. The result is persisted (published to INKA_SHARED_DIR, else written
+# to the snapshot), so the other workers switch to it within seconds and a restart keeps it.
+# GET /ready reports which indexes the background warm-up has built (503 until the catalog is loaded).
+# GET /metrics exports stage timings and cache counters in the Prometheus text format; with the
+# same token, an X-Inka-Profile: 1 header adds a cProfile report of that request's computation.
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from .cache import LRUCache, normalize_query
+from .engine import InkaEngine
+from .ingest import parse_delta
+from .metrics import metrics, profile, startup, timed
+from .profiles import ProfileStore
+
+# Heavy modules (scikit-learn, rapidfuzz) are imported by the code that first needs them
+startup('imports')
+
+
+def to_records(result):
+    if isinstance(result, pd.DataFrame):
+        return json.loads(result.to_json(orient='records', force_ascii=False))
+    return []
+
+
+def to_payload(result):
+    if isinstance(result, str):
+        return {'results': [], 'message': result}
+    return {'results': to_records(result)}
+
+
+def create_app(engine=None, snapshot_path=None, max_workers=None, cache_size=4096, cache_ttl=600, admin_token=None,
+               shared_dir=None, profiles_path=None):
+    snapshot_path = snapshot_path or os.environ.get('INKA_SNAPSHOT')
+    shared_dir = shared_dir or os.environ.get('INKA_SHARED_DIR')
+    admin_token = admin_token or os.environ.get('INKA_ADMIN_TOKEN')
+    cache = LRUCache(maxsize=cache_size, ttl=cache_ttl, name='api')
+    profile_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # The catalog loads in the background; requests wait for it, GET /ready reports progress
+        if engine is None and shared_dir:
+            app.state.engine = InkaEngine.from_shared(shared_dir, background=True)
+        elif engine is None and snapshot_path:
+            app.state.engine = InkaEngine.from_snapshot(snapshot_path, refresh=False, path=snapshot_path,
+                                                        background=True)
+        else:
+            app.state.engine = engine or InkaEngine.from_snapshot(background=True)
+        app.state.profiles = ProfileStore(profiles_path) if profiles_path else ProfileStore()
+        # Scoring is CPU bound: keep it off the event loop
+        app.state.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inka')
+        yield
+        app.state.executor.shutdown(wait=False)
+
+    app = FastAPI(title="I.N.K.A. & Chill", lifespan=lifespan)
+    app.state.cache = cache
+
+    # compute(engine) runs the query against the engine or, when profiling, against its current
+    # CatalogState: that bypasses the response cache and the engine's memo, so the report covers the
+    # actual computation
+    async def respond(request, kind, key, compute):
+        engine = app.state.engine
+        loop = asyncio.get_running_loop()
+        if admin_token and request.headers.get('x-inka-profile') == '1' \
+                and request.headers.get('x-inka-token') == admin_token:
+            payload, report = await loop.run_in_executor(app.state.executor, lambda: profile(compute, engine.state))
+            return {**payload, 'profile': report}
+        if engine.poll_due():
+            # Switch to a catalog another worker persisted before answering from the cache
+            await loop.run_in_executor(app.state.executor, engine.poll)
+        cache_key = (kind, engine.generation, *key)
+        with timed('api', kind):
+            payload = cache.get(cache_key)
+            if payload is None:
+                payload = await loop.run_in_executor(app.state.executor, compute, engine)
+                cache.set(cache_key, payload)
+        return payload
+
+    # Never waits for the background load: movies is null until the catalog is ready
+    @app.get("/health")
+    async def health():
+        engine = app.state.engine
+        return {'status': 'ok', 'movies': len(engine.catalog) if engine.readiness()['catalog'] else None,
+                'cache': {'size': len(cache), 'hits': cache.hits, 'misses': cache.misses}}
+
+    @app.get("/recommend/simple")
+    async def simple(request: Request, percentile: float = Query(0.95, gt=0, lt=1)):
+        return await respond(request, 'simple', (percentile,), lambda engine: to_payload(engine.simple(percentile)))
+
+    @app.get("/recommend/genre")
+    async def genre(request: Request, q: str = Query(..., min_length=1), percentile: float = Query(0.90, gt=0, lt=1)):
+        q = normalize_query(q)
+        return await respond(request, 'genre', (q, percentile), lambda engine: to_payload(engine.genre(q, percentile)))
+
+    @app.get("/recommend/director")
+    async def director(request: Request, q: str = Query(..., min_length=1), percentile: float = Query(0.90, gt=0, lt=1)):
+        q = normalize_query(q)
+
+        def compute(engine):
+            matches, recommendations = engine.director(q, percentile)
+            return {'matches': list(matches), **to_payload(recommendations)}
+        return await respond(request, 'director', (q, percentile), compute)
+
+    @app.get("/recommend/cast")
+    async def cast(request: Request, q: str = Query(..., min_length=1), percentile: float = Query(0.90, gt=0, lt=1)):
+        q = normalize_query(q)
+        return await respond(request, 'cast', (q, percentile), lambda engine: to_payload(engine.cast(q, percentile)))
+
+    @app.get("/recommend/content")
+    async def content(request: Request, q: str = Query(..., min_length=1), top_n: int = Query(10, ge=1, le=100)):
+        # Exact title matching is case sensitive, so only whitespace is normalized here
+        q = normalize_query(q, casefold=False)
+        return await respond(request, 'content', (q, top_n), lambda engine: to_payload(engine.content(q, top_n)))
+
+    @app.get("/recommend/keyword")
+    async def keyword(request: Request, q: str = Query(..., min_length=1), top_n: int = Query(10, ge=1, le=100)):
+        q = normalize_query(q)
+        return await respond(request, 'keyword', (q, top_n), lambda engine: to_payload(engine.keyword(q, top_n)))
+
+    @app.get("/recommend/semantic")
+    async def semantic(request: Request, q: str = Query(..., min_length=1), top_n: int = Query(10, ge=1, le=100)):
+        q = normalize_query(q)
+        return await respond(request, 'semantic', (q, top_n), lambda engine: to_payload(engine.semantic(q, top_n)))
+
+    @app.get("/recommend/mood")
+    async def mood(request: Request, q: str = Query(..., min_length=1), top_n: int = Query(10, ge=1, le=100)):
+        q = normalize_query(q)
+        return await respond(request, 'mood', (q, top_n), lambda engine: to_payload(engine.mood(q, top_n)))
+
+    # /recommend/hybrid?mood=dark&genres=thriller&director=fincher&title=Se7en; genres and cast repeat
+    @app.get("/recommend/hybrid")
+    async def hybrid(request: Request, mood: Optional[str] = None, genres: List[str] = Query([]),
+                     director: Optional[str] = None, cast: List[str] = Query([]), title: Optional[str] = None,
+                     keywords: Optional[str] = None, top_n: int = Query(10, ge=1, le=100)):
+        mood, director, keywords = (normalize_query(q) if q else None for q in (mood, director, keywords))
+        genres = sorted({normalize_query(g) for g in genres if g.strip()})
+        cast = sorted({normalize_query(c) for c in cast if c.strip()})
+        title = normalize_query(title, casefold=False) if title else None
+        if not (mood or genres or director or cast or title or keywords):
+            raise HTTPException(422, "En az bir ölçüt gerekli: mood, genres, director, cast, title veya keywords.")
+        return await respond(request, 'hybrid', (mood, tuple(genres), director, tuple(cast), title, keywords, top_n),
+                             lambda engine: to_payload(engine.hybrid(mood, genres, director, cast, title, keywords,
+                                                                     top_n)))
+
+    # Taste profiles by user id: each viewed title updates the profile, /recommend/personal ranks by it.
+    # Both depend on the user's history, so they bypass the response cache.
+    @app.post("/profiles/{user}/views")
+    async def view(user: str, title: str = Query(..., min_length=1)):
+        def record():
+            with profile_lock:
+                taste = app.state.profiles.get(user)
+                if not app.state.engine.record_view(taste, title):
+                    return None
+                app.state.profiles.put(user, taste)
+            return {'features': len(taste.weights), 'seen': len(taste.seen)}
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(app.state.executor, record)
+        if payload is None:
+            raise HTTPException(404, f"Film bulunamadı: {title}")
+        return payload
+
+    @app.get("/recommend/personal")
+    async def personal(user: str = Query(..., min_length=1), top_n: int = Query(10, ge=1, le=100)):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(app.state.executor, lambda: to_payload(
+            app.state.engine.personal(app.state.profiles.get(user), top_n)))
+
+    # Catalog and index readiness; 503 until the catalog is loaded
+    @app.get("/ready")
+    async def ready():
+        readiness = app.state.engine.readiness()
+        if not readiness['catalog']:
+            raise HTTPException(503, "Katalog yükleniyor.")
+        return readiness
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def prometheus():
+        return metrics.to_prometheus()
+
+    # Upserts run off the event loop; readers keep using the previous state until the swap. Other workers
+    # pick the persisted result up on their next poll, this one's response cache is cleared right away.
+    @app.post("/catalog/delta")
+    async def delta(request: Request, x_inka_token: str = Header(None)):
+        if not admin_token or x_inka_token != admin_token:
+            raise HTTPException(403, "Yetkisiz istek.")
+        body = await request.body()
+        loop = asyncio.get_running_loop()
+        engine = app.state.engine
+        try:
+            changed, movies = await loop.run_in_executor(
+                app.state.executor, lambda: (engine.apply_delta(parse_delta(body)), len(engine.catalog)))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        cache.clear()
+        return {'changed': changed, 'movies': movies}
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,121 @@
+# Offline batch mode: run the recommenders over the common queries and store the results so the
+# app and API answer them with a single lookup.
+#
+#   python -m inka.batch                              # every genre and mood, top directors/cast/titles
+#   python -m inka.batch --top 2000 --workers 8
+#   python -m inka.batch --queries queries.tsv        # extra "recommender<TAB>query" lines
+#
+# Each worker process loads its own copy of the catalog and indexes.
+import argparse
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import PrecomputedStore, normalize_query
+from .config import INDEX_DIR, SNAPSHOT_PATH
+from .indexes import top_k_indices
+
+RECOMMENDERS = ['simple', 'genre', 'mood', 'director', 'cast', 'content', 'keyword', 'semantic']
+
+_state = None
+
+
+# Query keys worth precomputing: every genre and mood plus the top directors, cast members and titles
+def enumerate_queries(state, top=500, recommenders=RECOMMENDERS):
+    from .recommenders import mood_to_genre, mood_translation
+    catalog = state.catalog
+
+    def cast():
+        index = state.cast_index
+        return [index.display_names[i] for i in top_k_indices(np.diff(index.indptr), top)]
+
+    queries = {
+        'simple': lambda: [''],
+        'genre': lambda: state.genres,
+        'mood': lambda: sorted(set(mood_to_genre) | set(mood_translation)),
+        'director': lambda: catalog['directors'].value_counts().index[:top].astype(str),
+        'cast': cast,
+        'content': lambda: catalog['title'].iloc[top_k_indices(
+            catalog['popularity'].fillna(-np.inf).to_numpy(dtype=np.float64), top)],
+    }
+    return {kind: list(queries[kind]()) for kind in recommenders if kind in queries}
+
+
+def compute(state, kind, query):
+    method = getattr(state, kind)
+    return method() if kind == 'simple' else method(query)
+
+
+def _init_worker(snapshot_path, index_dir):
+    global _state
+    from .engine import CatalogState
+    from .ingest import read_snapshot
+    _state = CatalogState(read_snapshot(snapshot_path), index_dir)
+
+
+def _run(tasks):
+    return [(kind, query, pickle.dumps(compute(_state, kind, query), pickle.HIGHEST_PROTOCOL))
+            for kind, query in tasks]
+
+
+def run_batch(snapshot_path=SNAPSHOT_PATH, index_dir=INDEX_DIR, store=None, recommenders=RECOMMENDERS, top=500,
+              extra=(), workers=None, chunk_size=32):
+    from .engine import CatalogState
+    from .ingest import read_snapshot
+    state = CatalogState(read_snapshot(snapshot_path), index_dir)
+    queries = enumerate_queries(state, top, recommenders)
+    for kind, query in extra:
+        queries.setdefault(kind, []).append(query)
+    # Grouped by recommender so a worker's chunk reuses the same indexes
+    tasks = sorted({(kind, normalize_query(query, casefold=kind != 'content'))
+                    for kind, kind_queries in queries.items() for query in kind_queries
+                    if kind in RECOMMENDERS and (query or kind == 'simple')})
+    # Build the disk-cached text indexes once here instead of racing in every worker
+    if any(kind == 'semantic' for kind, _ in tasks):
+        state.semantic_index
+    elif any(kind == 'keyword' for kind, _ in tasks):
+        state.tfidf_index
+
+    store = store or PrecomputedStore(os.path.join(index_dir, "precomputed.sqlite"))
+    chunks = [tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+    workers = workers or min(4, os.cpu_count() or 1)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(snapshot_path, index_dir)) as pool:
+        done = 0
+        for results in pool.map(_run, chunks):
+            store.put_many(results, state.version)
+            done += len(results)
+            print(f"{done}/{len(tasks)} sorgu hesaplandı ({time.perf_counter() - start:.1f}s)", flush=True)
+    store.prune(state.version)
+    return len(tasks)
+
+
+def read_queries(path):
+    with open(path, encoding='utf-8') as f:
+        return [tuple(line.rstrip('\n').split('\t', 1)) for line in f if '\t' in line]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="I.N.K.A. precomputed recommendations")
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    parser.add_argument('--recommenders', nargs='+', default=RECOMMENDERS, choices=RECOMMENDERS)
+    parser.add_argument('--top', type=int, default=500, help="directors, cast members and titles to precompute")
+    parser.add_argument('--queries', help="extra queries, one 'recommender<TAB>query' per line")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    extra = [(kind, query) for kind, query in read_queries(args.queries) if kind in args.recommenders] \
+        if args.queries else []
+    count = run_batch(args.snapshot, args.index_dir, recommenders=args.recommenders, top=args.top, extra=extra,
+                      workers=args.workers)
+    print(f"{count} sonuç {os.path.join(args.index_dir, 'precomputed.sqlite')} dosyasına yazıldı")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
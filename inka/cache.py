@@ -0,0 +1,111 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .config import INDEX_DIR
+from .metrics import count
+
+PRECOMPUTED_PATH = os.path.join(INDEX_DIR, "precomputed.sqlite")
+
+
+# Cache/store key for a user query; titles keep their case since exact title matching is case sensitive
+def normalize_query(query, casefold=True):
+    query = ' '.join(query.split())
+    return query.casefold() if casefold else query
+
+
+# Thread-safe LRU with an optional time-to-live per entry; a named cache also reports to inka.metrics
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                hit = False
+        if self.name:
+            count('cache_hits' if hit else 'cache_misses', cache=self.name)
+        return entry[1] if hit else default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Batch-computed recommender results keyed by (recommender, normalized query, catalog version).
+# Written by `python -m inka.batch`; a miss (or another catalog version) means compute live.
+class PrecomputedStore:
+    def __init__(self, path=PRECOMPUTED_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results ("
+                             "recommender TEXT, query TEXT, version TEXT, result BLOB, "
+                             "PRIMARY KEY (recommender, query, version))")
+
+    # None when the store exists but was never filled, so callers skip the lookup entirely
+    @classmethod
+    def open(cls, path=PRECOMPUTED_PATH):
+        if not os.path.exists(path):
+            return None
+        store = cls(path)
+        return store if len(store) else None
+
+    # Whether any result was computed for this catalog version
+    def has_version(self, version):
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM results WHERE version = ? LIMIT 1", (version,)).fetchone()
+        return row is not None
+
+    def get(self, recommender, query, version):
+        with self._lock:
+            row = self._db.execute("SELECT result FROM results WHERE recommender = ? AND query = ? AND version = ?",
+                                   (recommender, query, version)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    # items: iterable of (recommender, query, pickled result)
+    def put_many(self, items, version):
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                 [(recommender, query, version, result) for recommender, query, result in items])
+
+    # Drop results computed for any other catalog version
+    def prune(self, version):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM results WHERE version != ?", (version,))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
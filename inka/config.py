@@ -0,0 +1,21 @@
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# GitHub URL of dataset
+DATA_URL = "https://raw.githubusercontent.com/donayy/inka/refs/heads/main/movies_dataset.csv"
+POSTER_BASE_URL = "https://image.tmdb.org/t/p/w500"
+
+# Local columnar snapshot of the dataset
+SNAPSHOT_DIR = os.path.join(ROOT_DIR, "data")
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "movies.parquet")
+META_PATH = os.path.join(SNAPSHOT_DIR, "movies.meta.json")
+
+# Local directory for persisted indexes and caches
+INDEX_DIR = os.path.join(ROOT_DIR, ".inka_cache")
+
+# Versioned catalog + indexes memory-mapped by every worker process (inka.shared)
+SHARED_DIR = os.path.join(INDEX_DIR, "shared")
+
+# Disk cache of poster thumbnails for the app (inka.posters)
+POSTER_DIR = os.path.join(INDEX_DIR, "posters")
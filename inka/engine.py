@@ -0,0 +1,547 @@
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache, PrecomputedStore, normalize_query
+from .config import DATA_URL, INDEX_DIR, SHARED_DIR, SNAPSHOT_PATH
+from .indexes import (Autocomplete, CastIndex, FuzzyMatcher, GenreIndex, SimilarityIndex, TasteIndex, TfidfIndex,
+                      WeightedRating)
+from .ingest import (catalog_version, file_lock, merge_delta, read_aliases, read_meta, read_snapshot, refresh_snapshot,
+                     snapshot_meta_path, write_snapshot)
+from .metrics import count, startup, timed
+from .recommenders import (cast_based_recommender, content_based_recommender, director_based_recommender,
+                           genre_based_recommender, hybrid_recommender, keyword_based_recommender,
+                           mood_based_recommender, mood_translation, personalized_recommender, semantic_recommender,
+                           simple_recommender)
+from .profiles import TasteProfile
+
+logger = logging.getLogger('inka.engine')
+
+# Recommenders return a DataFrame, or a message when nothing matches
+Recommendations = Union[pd.DataFrame, str]
+
+
+# Catalog columns each index reads; an index no delta column touches is shared with the next state.
+# The weighted rating's C and m are cached per genre, director and cast subset, so those count too.
+INDEX_COLUMNS = {
+    'weighted_rating': {'numVotes', 'averageRating', 'genres', 'directors', 'cast', 'title'},
+    'genre_index': {'genres', 'popularity', 'numVotes', 'averageRating', 'title'},
+    'cast_index': {'cast'},
+    'tfidf_index': {'overview', 'keywords', 'tagline'},
+    'semantic_index': {'overview', 'keywords', 'tagline'},
+    'similarity_index': {'genres', 'keywords'},
+    'taste_index': {'genres', 'keywords', 'cast', 'directors', 'title'},
+    'director_matcher': {'directors'},
+    'cast_matcher': {'cast'},
+    'title_matcher': {'title', 'original_title'},
+    'autocomplete:genre': {'genres'},
+    'autocomplete:director': {'directors'},
+    'autocomplete:cast': {'cast'},
+    'autocomplete:title': {'title', 'popularity'},
+}
+
+# Built in this order by the background warm-up: what the first pages need first, the text indexes last
+WARM_INDEXES = ['version', 'weighted_rating', 'genre_index', 'autocomplete:genre', 'director_matcher',
+                'autocomplete:director', 'cast_index', 'cast_matcher', 'autocomplete:cast', 'title_matcher',
+                'autocomplete:title', 'similarity_index', 'tfidf_index']
+
+
+# One catalog version plus every derived index; indexes are built on first use and shared by all callers.
+# The catalog is never modified in place (updated() builds the next one), so results can be shared too.
+# aliases maps the ids of movies collapsed into another one to that movie's id (see ingest.merge_delta).
+class CatalogState:
+    def __init__(self, catalog: pd.DataFrame, index_dir: str = INDEX_DIR, aliases: Dict[int, int] = None):
+        self.catalog = catalog
+        self.index_dir = index_dir
+        self.aliases = aliases or {}
+        self._indexes = {}
+        self._locks = {}
+        # Rows changed by the delta this state was built with (updated)
+        self.delta_rows = np.array([], dtype=np.int64)
+        self._lock = threading.Lock()
+
+    # One lock per index, so a caller only waits for the index it uses, not for one being warmed up
+    def _index(self, name, build):
+        index = self._indexes.get(name)
+        if index is None:
+            with self._lock:
+                lock = self._locks.setdefault(name, threading.Lock())
+            with lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    with timed('index', name):
+                        index = self._indexes[name] = build()
+        return index
+
+    def _build(self, name):
+        if name.startswith('autocomplete:'):
+            return self.autocomplete(name.split(':', 1)[1])
+        return getattr(self, name)
+
+    # Build the given indexes one after another, e.g. in a background thread. A failure only leaves
+    # that index to be built (and raise) on first use.
+    def warm(self, names: List[str] = WARM_INDEXES):
+        for name in names:
+            try:
+                self._build(name)
+            except Exception:
+                count('warmup_errors', index=name)
+
+    def readiness(self, names: List[str] = WARM_INDEXES) -> Dict[str, bool]:
+        return {name: name in self._indexes for name in names}
+
+    # Content hash of the catalog; keys precomputed results
+    @property
+    def version(self) -> str:
+        return self._index('version', lambda: catalog_version(self.catalog))
+
+    @property
+    def weighted_rating(self) -> WeightedRating:
+        return self._index('weighted_rating', lambda: WeightedRating(self.catalog))
+
+    @property
+    def similarity_index(self) -> SimilarityIndex:
+        return self._index('similarity_index', lambda: SimilarityIndex(self.catalog))
+
+    @property
+    def tfidf_index(self) -> TfidfIndex:
+        return self._index('tfidf_index', lambda: TfidfIndex.load_or_build(self.catalog, self.index_dir))
+
+    @property
+    def semantic_index(self) -> 'SemanticIndex':
+        from .semantic import SemanticIndex
+        return self._index('semantic_index', lambda: SemanticIndex.load_or_build(self.tfidf_index, self.index_dir))
+
+    @property
+    def cast_index(self) -> CastIndex:
+        return self._index('cast_index', lambda: CastIndex(self.catalog))
+
+    @property
+    def taste_index(self) -> TasteIndex:
+        return self._index('taste_index', lambda: TasteIndex(self.catalog))
+
+    @property
+    def director_matcher(self) -> FuzzyMatcher:
+        return self._index('director_matcher', lambda: FuzzyMatcher(self.catalog['directors'].dropna().unique()))
+
+    @property
+    def cast_matcher(self) -> FuzzyMatcher:
+        return self._index('cast_matcher', lambda: FuzzyMatcher(self.cast_index.names))
+
+    @property
+    def title_matcher(self) -> FuzzyMatcher:
+        return self._index('title_matcher', lambda: FuzzyMatcher(
+            pd.concat([self.catalog['title'], self.catalog['original_title']]).dropna().unique()))
+
+    @property
+    def genre_index(self) -> GenreIndex:
+        return self._index('genre_index', lambda: GenreIndex(self.catalog))
+
+    @property
+    def genres(self) -> List[str]:
+        return self.genre_index.names
+
+    def autocomplete(self, kind: str) -> Autocomplete:
+        return self._index(f'autocomplete:{kind}', lambda: self._build_autocomplete(kind))
+
+    def _build_autocomplete(self, kind):
+        if kind == 'genre':
+            index = self.genre_index
+            return Autocomplete(index.names, [len(ranks) for ranks in index.popularity_ranks])
+        if kind == 'director':
+            counts = self.catalog['directors'].value_counts()
+            return Autocomplete(counts.index.astype(str), counts.to_numpy())
+        if kind == 'cast':
+            index = self.cast_index
+            return Autocomplete(index.display_names, np.diff(index.indptr))
+        if kind == 'title':
+            return Autocomplete(self.catalog['title'], self.catalog['popularity'])
+        raise ValueError(f"Unknown suggestion kind: {kind}")
+
+    # Next state with the delta merged in. Indexes this state has built are carried over: patched
+    # in place where they support it, shared when the delta does not touch their columns, and
+    # rebuilt otherwise, so the new state is as warm as this one.
+    def updated(self, delta: pd.DataFrame) -> 'CatalogState':
+        catalog, rows, aliases = merge_delta(self.catalog, delta, self.aliases)
+        touched = set(catalog.columns) if len(catalog) > len(self.catalog) else set(delta.columns)
+        state = CatalogState(catalog, self.index_dir, aliases)
+        state.delta_rows = rows
+        patch = {
+            'version': lambda version: hashlib.sha256(
+                f"{version}:{catalog_version(delta)}".encode()).hexdigest()[:16],
+            'weighted_rating': lambda index: index.updated(catalog, rows),
+            'genre_index': lambda index: index.updated(catalog, rows),
+            'cast_index': lambda index: index.updated(catalog, rows),
+            'tfidf_index': lambda index: index.updated(catalog, rows),
+            'semantic_index': lambda index: index.updated(state.tfidf_index, rows),
+        }
+        for name, index in list(self._indexes.items()):
+            if not INDEX_COLUMNS.get(name, touched) & touched:
+                state._indexes[name] = index
+            elif name in patch:
+                state._indexes[name] = patch[name](index)
+        for name in self._indexes:
+            state._build(name)
+        return state
+
+    # Top suggestions for a partially typed genre, director, cast member or title
+    def suggest(self, kind: str, partial: str, limit: int = 10) -> List[str]:
+        return self.autocomplete(kind).suggest(partial, limit)
+
+    def simple(self, percentile: float = 0.95) -> pd.DataFrame:
+        return simple_recommender(self.catalog, percentile, weighted_rating=self.weighted_rating)
+
+    def genre(self, genre: str, percentile: float = 0.90) -> Recommendations:
+        return genre_based_recommender(self.catalog, genre, percentile, weighted_rating=self.weighted_rating,
+                                       genre_index=self.genre_index)
+
+    def director(self, director: str, percentile: float = 0.90) -> Tuple[List[str], pd.DataFrame]:
+        return director_based_recommender(director, self.catalog, percentile, weighted_rating=self.weighted_rating,
+                                          director_matcher=self.director_matcher)
+
+    def cast(self, cast_name: str, percentile: float = 0.90) -> Recommendations:
+        return cast_based_recommender(self.catalog, cast_name, percentile, weighted_rating=self.weighted_rating,
+                                      cast_index=self.cast_index, cast_matcher=self.cast_matcher)
+
+    def content(self, title: str, top_n: int = 10) -> pd.DataFrame:
+        return content_based_recommender(title, self.catalog, top_n, similarity_index=self.similarity_index,
+                                         title_matcher=self.title_matcher)
+
+    def keyword(self, keyword: str, top_n: int = 10) -> pd.DataFrame:
+        return keyword_based_recommender(keyword, self.catalog, top_n, tfidf_index=self.tfidf_index)
+
+    def semantic(self, query: str, top_n: int = 10) -> pd.DataFrame:
+        return semantic_recommender(query, self.catalog, top_n, tfidf_index=self.tfidf_index,
+                                    semantic_index=self.semantic_index)
+
+    # Accepts English moods and their Turkish names from mood_translation
+    def mood(self, mood: str, top_n: int = 10) -> Recommendations:
+        return mood_based_recommender(mood_translation.get(mood.lower(), mood.lower()), self.catalog, top_n,
+                                      genre_index=self.genre_index)
+
+    # Add a viewed result to the profile; titles shown as "title / original title" are matched too.
+    # Returns False when the title is not in the catalog.
+    def record_view(self, profile: TasteProfile, title: str) -> bool:
+        index = self.taste_index
+        title = title if title in index.title_rows else title.split(' / ')[0]
+        row = index.title_rows.get(title)
+        if row is None:
+            return False
+        profile.add(title, index.features(row))
+        return True
+
+    def personal(self, profile: TasteProfile, top_n: int = 10) -> Recommendations:
+        return personalized_recommender(self.catalog, profile, top_n, taste_index=self.taste_index)
+
+    # Any combination of mood, genres, director, cast, reference title and keywords in one ranking;
+    # only the indexes of the given signals are built
+    def hybrid(self, mood: str = None, genres: List[str] = (), director: str = None, cast: List[str] = (),
+               title: str = None, keywords: str = None, top_n: int = 10, weights: dict = None) -> Recommendations:
+        wanted = bool(mood or genres)
+        return hybrid_recommender(
+            self.catalog, mood, genres, director, cast, title, keywords, top_n, weights,
+            weighted_rating=self.weighted_rating,
+            genre_index=self.genre_index if wanted else None,
+            director_matcher=self.director_matcher if director else None,
+            cast_index=self.cast_index if cast else None, cast_matcher=self.cast_matcher if cast else None,
+            similarity_index=self.similarity_index if title else None,
+            title_matcher=self.title_matcher if title else None,
+            tfidf_index=self.tfidf_index if keywords else None)
+
+
+# Stable handle over the current CatalogState. A delta builds the next state off to the side and
+# swaps it in with a single assignment, so every call sees one consistent catalog and index set.
+class InkaEngine:
+    def __init__(self, catalog: pd.DataFrame = None, index_dir: str = INDEX_DIR, store: PrecomputedStore = None,
+                 memo_size: int = 2048):
+        self.index_dir = index_dir
+        self.store = store
+        # Where a precomputed store may appear later (see _check_store), and what was last logged about it
+        self._store_path = None
+        self._store_lock = threading.Lock()
+        self._store_status = None
+        # Memoized results of every state; a new catalog version simply stops matching the old keys
+        self.results = LRUCache(memo_size, name='results')
+        self._update_lock = threading.Lock()
+        self._shared_root = None
+        self._shared_version = None
+        self._snapshot_path = None
+        self._snapshot_mtime = None
+        self._poll_interval = None
+        self._next_poll = 0.0
+        self._state = None
+        # Bumped on every state swap; keys caches kept outside the engine, e.g. the API's responses
+        self.generation = 0
+        self._loaded = threading.Event()
+        self._load_error = None
+        self._served = False
+        if catalog is not None:
+            self.state = CatalogState(catalog, index_dir)
+
+    # The current state; while the catalog is loading in the background, callers wait for it here
+    @property
+    def state(self) -> CatalogState:
+        if not self._loaded.is_set():
+            with timed('startup', 'wait'):
+                self._loaded.wait()
+        if self._load_error is not None:
+            raise self._load_error
+        return self._state
+
+    @state.setter
+    def state(self, state: CatalogState):
+        self._state = state
+        self.generation += 1
+        self._check_store()
+        self._loaded.set()
+
+    # Opens the precomputed store once `python -m inka.batch` has filled it, so a store built after
+    # startup is used without a restart, and logs when results are computed on request instead
+    def _check_store(self):
+        if self._store_path is None:
+            return
+        with self._store_lock:
+            if self.store is None:
+                self.store = PrecomputedStore.open(self._store_path)
+            state = self._state
+            if state is None:
+                return
+            if self.store is None:
+                status = 'missing'
+            else:
+                status = 'ready' if self.store.has_version(state.version) else 'stale'
+            if (status, state.version) == self._store_status:
+                return
+            self._store_status = (status, state.version)
+        if status == 'missing':
+            logger.warning("Önceden hesaplanmış sonuç deposu yok (%s); sonuçlar istek anında hesaplanıyor.",
+                           self._store_path)
+        elif status == 'stale':
+            logger.warning("Önceden hesaplanmış sonuçlar başka bir katalog sürümüne ait (%s); sonuçlar istek anında "
+                           "hesaplanıyor.", state.version)
+        else:
+            logger.info("Önceden hesaplanmış sonuçlar kullanılıyor: %s", self._store_path)
+
+    # Returns at once: `load` (returning a CatalogState) runs in a background thread, followed by the
+    # `warm` indexes. Calls wait for the catalog, then only for the index they use.
+    def load_in_background(self, load: Callable[[], CatalogState], warm: List[str] = WARM_INDEXES) -> 'InkaEngine':
+        def run():
+            try:
+                with timed('startup', 'catalog'):
+                    state = load()
+            except Exception as e:
+                self._load_error = e
+                self._loaded.set()
+                return
+            self.state = state
+            startup('catalog_ready')
+            state.warm(warm)
+            startup('indexes_ready')
+
+        threading.Thread(target=run, name='inka-load', daemon=True).start()
+        return self
+
+    def _load(self, load, background):
+        if background:
+            return self.load_in_background(load)
+        self.state = load()
+        startup('catalog_ready')
+        return self
+
+    # Load the snapshot at path, refreshed from source first; requests switch to the snapshot another
+    # process rewrote (e.g. with a delta) within poll_interval seconds
+    @classmethod
+    def from_snapshot(cls, source: str = DATA_URL, refresh: bool = True, index_dir: str = INDEX_DIR,
+                      background: bool = False, path: str = SNAPSHOT_PATH, poll_interval: float = 5.0) -> 'InkaEngine':
+        engine = cls(None, index_dir)
+        engine._store_path = os.path.join(index_dir, "precomputed.sqlite")
+        engine._snapshot_path, engine._poll_interval = path, poll_interval
+        engine._next_poll = time.monotonic() + poll_interval
+
+        def load():
+            if refresh or not os.path.exists(path):
+                with timed('load', 'refresh'):
+                    refresh_snapshot(source, path, snapshot_meta_path(path), timeout=5)
+            return engine._read_snapshot()
+        return engine._load(load, background)
+
+    # State of the snapshot file; its modification time is taken first, so a later rewrite is never missed
+    def _read_snapshot(self):
+        self._snapshot_mtime = _mtime(self._snapshot_path)
+        with timed('load', 'read'):
+            return CatalogState(read_snapshot(self._snapshot_path), self.index_dir,
+                                read_aliases(snapshot_meta_path(self._snapshot_path)))
+
+    # Attach to the catalog published by inka.shared; requests switch to a newly published version
+    # within poll_interval seconds
+    @classmethod
+    def from_shared(cls, root: str = SHARED_DIR, index_dir: str = INDEX_DIR, poll_interval: float = 5.0,
+                    background: bool = False) -> 'InkaEngine':
+        from .shared import attach, current_version
+        version = current_version(root)
+        engine = cls(None, index_dir)
+        engine._store_path = os.path.join(index_dir, "precomputed.sqlite")
+        engine._shared_root, engine._shared_version, engine._poll_interval = root, version, poll_interval
+        engine._next_poll = time.monotonic() + poll_interval
+        return engine._load(lambda: attach(root, version, index_dir), background)
+
+    # What is ready without waiting: the catalog and each warm-up index
+    def readiness(self) -> Dict[str, bool]:
+        state = self._state if self._load_error is None else None
+        if state is None:
+            return {'catalog': False, **{name: False for name in WARM_INDEXES}}
+        return {'catalog': True, **state.readiness()}
+
+    # Switch to the currently published shared version or the rewritten snapshot if it changed;
+    # returns True when it switched
+    def refresh(self) -> bool:
+        with self._update_lock:
+            state = self._changed()
+            if state is None:
+                return False
+            self.state = state
+        self.results.clear()
+        threading.Thread(target=state.warm, name='inka-warmup', daemon=True).start()
+        return True
+
+    # The persisted catalog when another process changed it since it was loaded, else None.
+    # Callers hold _update_lock.
+    def _changed(self):
+        if self._state is None:
+            return None
+        if self._shared_root is not None:
+            from .shared import attach, current_version
+            version = current_version(self._shared_root)
+            if version is None or version == self._shared_version:
+                return None
+            state = attach(self._shared_root, version, self.index_dir)
+            self._shared_version = version
+            return state
+        if self._snapshot_path is not None and _mtime(self._snapshot_path) != self._snapshot_mtime:
+            return self._read_snapshot()
+        return None
+
+    # True when poll() would check the persisted catalog for changes
+    def poll_due(self) -> bool:
+        return self._poll_interval is not None and time.monotonic() >= self._next_poll
+
+    def poll(self):
+        if self.poll_due():
+            self._next_poll = time.monotonic() + self._poll_interval
+            if not self.refresh() and self.store is None:
+                self._check_store()
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'state':
+            raise AttributeError(name)
+        return getattr(self.state, name)
+
+    # Upsert rows by movie id (see ingest.parse_delta); returns the number of movies added or changed.
+    # A catalog loaded from a shared root or snapshot is persisted there under a file lock, on top of
+    # any change another process made first, so every worker switches to it and a restart keeps it.
+    def apply_delta(self, delta: pd.DataFrame) -> int:
+        target = os.path.join(self._shared_root, "CURRENT") if self._shared_root else self._snapshot_path
+        with self._update_lock, file_lock(target) if target else contextlib.nullcontext():
+            state = (self._changed() or self.state).updated(delta)
+            self._persist(state)
+            self.state = state
+        self.results.clear()
+        return len(state.delta_rows)
+
+    def _persist(self, state):
+        if self._shared_root is not None:
+            from .shared import publish_state
+            self._shared_version = publish_state(state, self._shared_root)
+        elif self._snapshot_path is not None:
+            meta_path = snapshot_meta_path(self._snapshot_path)
+            write_snapshot(state.catalog, dict(read_meta(meta_path), aliases=state.aliases), self._snapshot_path,
+                           meta_path)
+            self._snapshot_mtime = _mtime(self._snapshot_path)
+
+    # Results are memoized across callers by (recommender, normalized query, parameters, catalog version);
+    # default-parameter queries are also served from the precomputed store. Callers get copies, so a
+    # caller changing its result cannot change what the next one sees.
+    def _serve(self, kind, query, params, defaults, compute):
+        self.poll()
+        state = self.state
+        with timed(kind, 'total'):
+            query = normalize_query(query, casefold=kind != 'content')
+            key = (kind, query, params, state.version)
+            result = self.results.get(key)
+            if result is None:
+                if self.store is not None and defaults:
+                    result = self.store.get(kind, query, state.version)
+                    count('cache_hits' if result is not None else 'cache_misses', cache='precomputed')
+                if result is None:
+                    result = compute(state)
+                self.results.set(key, result)
+        if not self._served:
+            self._served = True
+            startup('first_result')
+        return _copy_result(result)
+
+    def simple(self, percentile: float = 0.95) -> pd.DataFrame:
+        return self._serve('simple', '', (percentile,), percentile == 0.95, lambda state: state.simple(percentile))
+
+    def genre(self, genre: str, percentile: float = 0.90) -> Recommendations:
+        return self._serve('genre', genre, (percentile,), percentile == 0.90,
+                           lambda state: state.genre(genre, percentile))
+
+    def director(self, director: str, percentile: float = 0.90) -> Tuple[List[str], pd.DataFrame]:
+        return self._serve('director', director, (percentile,), percentile == 0.90,
+                           lambda state: state.director(director, percentile))
+
+    def cast(self, cast_name: str, percentile: float = 0.90) -> Recommendations:
+        return self._serve('cast', cast_name, (percentile,), percentile == 0.90,
+                           lambda state: state.cast(cast_name, percentile))
+
+    def content(self, title: str, top_n: int = 10) -> pd.DataFrame:
+        return self._serve('content', title, (top_n,), top_n == 10, lambda state: state.content(title, top_n))
+
+    def keyword(self, keyword: str, top_n: int = 10) -> pd.DataFrame:
+        return self._serve('keyword', keyword, (top_n,), top_n == 10, lambda state: state.keyword(keyword, top_n))
+
+    def semantic(self, query: str, top_n: int = 10) -> pd.DataFrame:
+        return self._serve('semantic', query, (top_n,), top_n == 10, lambda state: state.semantic(query, top_n))
+
+    def mood(self, mood: str, top_n: int = 10) -> Recommendations:
+        return self._serve('mood', mood, (top_n,), top_n == 10, lambda state: state.mood(mood, top_n))
+
+    # Depends on the caller's profile, so it is never memoized
+    def personal(self, profile: TasteProfile, top_n: int = 10) -> Recommendations:
+        state = self.state
+        with timed('personal', 'total'):
+            return state.personal(profile, top_n)
+
+    def hybrid(self, mood: str = None, genres: List[str] = (), director: str = None, cast: List[str] = (),
+               title: str = None, keywords: str = None, top_n: int = 10, weights: dict = None) -> Recommendations:
+        params = (mood and normalize_query(mood), tuple(sorted({normalize_query(g) for g in genres})),
+                  director and normalize_query(director), tuple(sorted({normalize_query(c) for c in cast})),
+                  title and normalize_query(title, casefold=False), keywords and normalize_query(keywords), top_n,
+                  tuple(sorted((weights or {}).items())))
+        return self._serve('hybrid', '', params, False, lambda state: state.hybrid(mood, genres, director, cast, title,
+                                                                                   keywords, top_n, weights))
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _copy_result(result):
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if isinstance(result, tuple):
+        return tuple(_copy_result(item) for item in result)
+    if isinstance(result, list):
+        return list(result)
+    return result
@@ -0,0 +1,542 @@
+import bisect
+import copy
+import glob
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .config import INDEX_DIR
+from .ingest import fold_text, join_tokens, token_arrays
+
+
+# Distinct (row, key id) pairs of a token column, sorted by row then key id, plus the sorted keys and
+# the spelling each key first appears with. key maps a token to its index key, e.g. str.lower.
+def token_pairs(values, key=None):
+    offsets, ids, vocabulary = token_arrays(values)
+    used = np.unique(ids)
+    mapped = [vocabulary[i] if key is None else key(vocabulary[i]) for i in used]
+    keys = sorted(set(mapped))
+    positions = {name: i for i, name in enumerate(keys)}
+    remap = np.zeros(len(vocabulary), dtype=np.int64)
+    remap[used] = np.fromiter((positions[name] for name in mapped), dtype=np.int64, count=len(mapped))
+    token_keys = remap[ids]
+    _, first = np.unique(token_keys, return_index=True)
+    spellings = [vocabulary[ids[i]] for i in first]
+    width = max(len(keys), 1)
+    pairs = np.unique(np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets)) * width + token_keys)
+    return pairs // width, pairs % width, keys, spellings
+
+
+# Top-k helper: highest scores first, ties broken by row order
+def top_k_indices(scores, k):
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.argsort(-scores[selected], kind='stable')]
+
+
+# Fuzzy name matching: folded choices + trigram shortlist, scored with rapidfuzz
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Trigram -> sorted positions of the texts containing it
+def trigram_postings(texts):
+    postings = {}
+    for i, text in enumerate(texts):
+        for gram in trigrams(text):
+            postings.setdefault(gram, []).append(i)
+    return {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+
+# Positions of the texts that may contain query as a substring, from their trigram postings: those
+# holding every trigram of the query or, for queries shorter than a trigram, any trigram around it
+def substring_candidates(postings, query):
+    grams = {query[i:i + 3] for i in range(len(query) - 2)}
+    if not grams:
+        lists = [ids for gram, ids in postings.items() if query in gram]
+        return np.unique(np.concatenate(lists)) if lists else np.array([], dtype=np.int32)
+    if not grams <= postings.keys():
+        return np.array([], dtype=np.int32)
+    lists = sorted((postings[gram] for gram in grams), key=len)
+    candidates = lists[0]
+    for ids in lists[1:]:
+        candidates = np.intersect1d(candidates, ids, assume_unique=True)
+    return candidates
+
+
+class FuzzyMatcher:
+    def __init__(self, choices, shortlist_size=200):
+        self.choices = list(choices)
+        self.folded = [fold_text(choice) for choice in self.choices]
+        self.shortlist_size = shortlist_size
+        self.postings = trigram_postings(self.folded)
+
+    # Choices sharing the most trigrams with the query
+    def shortlist(self, query):
+        postings = [self.postings[gram] for gram in trigrams(query) if gram in self.postings]
+        if not postings:
+            return np.array([], dtype=np.int32)
+        counts = np.bincount(np.concatenate(postings), minlength=len(self.folded))
+        candidates = np.flatnonzero(counts)
+        if len(candidates) > self.shortlist_size:
+            candidates = candidates[top_k_indices(counts[candidates], self.shortlist_size)]
+        return candidates
+
+    # [(choice, score), ...] best first
+    def match(self, query, limit=10, score_cutoff=70):
+        from rapidfuzz import fuzz, process
+        query = fold_text(query)
+        if not query:
+            return []
+        candidates = self.shortlist(query)
+        results = process.extract(query, [self.folded[i] for i in candidates], scorer=fuzz.WRatio,
+                                  limit=limit, score_cutoff=score_cutoff)
+        return [(self.choices[candidates[i]], score) for _, score, i in results]
+
+
+# Copy of a per-row array resized to size rows, with values written at rows
+def _patched(array, size, rows, values):
+    patched = np.empty((size,) + array.shape[1:], dtype=array.dtype)
+    patched[:min(size, len(array))] = array[:size]
+    patched[rows] = values
+    return patched
+
+
+# Weighted rating (IMDB formula) shared by the popularity recommenders.
+# C and m are cached per subset key, e.g. ('genre', 'drama') or ('director', name).
+class WeightedRating:
+    max_cached_stats = 4096
+
+    def __init__(self, dataframe):
+        self.num_votes = pd.to_numeric(dataframe['numVotes'], errors='coerce').to_numpy(dtype=np.float64)
+        self.ratings = pd.to_numeric(dataframe['averageRating'], errors='coerce').to_numpy(dtype=np.float64)
+        self._stats = OrderedDict()
+
+    # Copy with the given rows re-read from the updated catalog; C and m are recomputed lazily
+    def updated(self, dataframe, rows):
+        index = copy.copy(self)
+        changed = dataframe.iloc[rows]
+        index.num_votes = _patched(self.num_votes, len(dataframe), rows,
+                                   pd.to_numeric(changed['numVotes'], errors='coerce').to_numpy(dtype=np.float64))
+        index.ratings = _patched(self.ratings, len(dataframe), rows,
+                                 pd.to_numeric(changed['averageRating'], errors='coerce').to_numpy(dtype=np.float64))
+        index._stats = OrderedDict()
+        return index
+
+    def stats(self, subset, key, percentile):
+        cache_key = (key, percentile)
+        stats = self._stats.get(cache_key)
+        if stats is None:
+            num_votes = self.num_votes[subset]
+            num_votes = num_votes[~np.isnan(num_votes)]
+            ratings = self.ratings[subset]
+            ratings = ratings[~np.isnan(ratings)]
+            C = ratings.mean() if len(ratings) else np.nan
+            m = np.quantile(num_votes, percentile) if len(num_votes) else np.nan
+            stats = self._stats[cache_key] = (C, m)
+            if len(self._stats) > self.max_cached_stats:
+                self._stats.popitem(last=False)
+        else:
+            try:
+                self._stats.move_to_end(cache_key)
+            except KeyError:
+                # Evicted by another thread meanwhile
+                pass
+        return stats
+
+    # Returns row positions of the top-k qualified movies and their weighted ratings.
+    # The subset is either a boolean mask or an array of row positions. Catalog rows are distinct
+    # movies (duplicates are collapsed at ingest), so there is nothing to deduplicate here.
+    def top_k(self, subset, key, percentile=0.90, k=10):
+        C, m = self.stats(subset, key, percentile)
+        rows = np.flatnonzero(subset) if subset.dtype == bool else np.sort(subset)
+        qualified = rows[(self.num_votes[rows] >= m) & ~np.isnan(self.ratings[rows])]
+        v = self.num_votes[qualified]
+        R = self.ratings[qualified]
+        wr = (v / (v + m) * R) + (m / (m + v) * C)
+        order = top_k_indices(wr, k)
+        return qualified[order], wr[order]
+
+
+# Genre bitsets: bit i of a row is set when the movie has genre names[i].
+# Per-genre row lists are presorted by popularity so a mood top-k is a merge, not a sort.
+# Weighted-rating orderings are cached per (genre, percentile), least recently used first out.
+class GenreIndex:
+    max_cached_rankings = 64
+
+    def __init__(self, dataframe):
+        rows, ids, self.names, _ = token_pairs(dataframe['genres'], str.lower)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.bits = self._encode(rows, ids, len(dataframe))
+        self._rank(dataframe['popularity'])
+
+    def _encode(self, rows, ids, size):
+        bits = np.zeros((size, max(1, (len(self.names) + 63) // 64)), dtype=np.uint64)
+        np.bitwise_or.at(bits, (rows, ids // 64), np.left_shift(np.uint64(1), (ids % 64).astype(np.uint64)))
+        return bits
+
+    # Popularity rank of every row (NaN last, ties by row order) and each genre's ranks in ascending order
+    def _rank(self, popularity):
+        popularity = pd.to_numeric(popularity, errors='coerce').to_numpy(dtype=np.float64)
+        self.popularity_order = np.argsort(-popularity, kind='stable')
+        rank = np.empty(len(popularity), dtype=np.int64)
+        rank[self.popularity_order] = np.arange(len(popularity))
+        self.popularity_ranks = [np.sort(rank[self.matches([name])]).astype(np.int32) for name in self.names]
+        self._ranked = OrderedDict()
+
+    # Copy with the given rows re-encoded; a genre the index has never seen means a full rebuild
+    def updated(self, dataframe, rows):
+        changed, ids, names, _ = token_pairs(dataframe['genres'].iloc[rows], str.lower)
+        if any(name not in self.positions for name in names):
+            return GenreIndex(dataframe)
+        ids = np.array([self.positions[name] for name in names], dtype=np.int64)[ids]
+        index = copy.copy(self)
+        index.bits = _patched(self.bits, len(dataframe), rows, self._encode(changed, ids, len(rows)))
+        index._rank(dataframe['popularity'])
+        return index
+
+    def mask(self, genres):
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        for genre in genres:
+            i = self.positions.get(genre.lower())
+            if i is not None:
+                mask[i // 64] |= np.uint64(1) << np.uint64(i % 64)
+        return mask
+
+    # Boolean mask of movies having any of the genres
+    def matches(self, genres):
+        return (self.bits & self.mask(genres)).any(axis=1)
+
+    def rows(self, genre):
+        i = self.positions.get(genre.lower())
+        if i is None:
+            return np.array([], dtype=np.int64)
+        return np.sort(self.popularity_order[self.popularity_ranks[i]])
+
+    # Most popular movies having any of the genres: k-way merge of the presorted lists
+    def most_popular(self, genres, k):
+        lists = [self.popularity_ranks[self.positions[g]] for g in {g.lower() for g in genres} if g in self.positions]
+        if not lists:
+            return np.array([], dtype=np.int64)
+        top = np.unique(np.concatenate([ranks[:k] for ranks in lists]))[:k]
+        return self.popularity_order[top]
+
+    # Full weighted-rating ordering of a genre, computed once per (genre, percentile)
+    def ranked(self, genre, percentile, weighted_rating):
+        key = (genre.lower(), percentile)
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            rows = self.rows(genre)
+            ranked = self._ranked[key] = weighted_rating.top_k(rows, ('genre', genre.lower()), percentile,
+                                                               k=len(rows))
+            if len(self._ranked) > self.max_cached_rankings:
+                self._ranked.popitem(last=False)
+        else:
+            try:
+                self._ranked.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread meanwhile
+                pass
+        return ranked
+
+
+# Autocomplete: sorted folded keys for prefix search (bisect) plus a trigram index for substrings.
+# Suggestions are ranked by weight (movie count or popularity).
+class Autocomplete:
+    def __init__(self, entries, weights):
+        best = {}
+        for entry, weight in zip(entries, weights):
+            key = fold_text(entry)
+            weight = 0.0 if pd.isna(weight) else float(weight)
+            if key and (key not in best or weight > best[key][1]):
+                best[key] = (entry, weight)
+        self.keys = sorted(best)
+        self.entries = [best[key][0] for key in self.keys]
+        self.weights = np.array([best[key][1] for key in self.keys], dtype=np.float64)
+        postings = {}
+        for i, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    # Keys containing the query: intersect the postings of its trigrams, then verify
+    def _containing(self, query):
+        if len(query) < 3:
+            # Too short for a trigram: only match the start of a later word
+            ids = self.postings.get(' ' + query) if len(query) == 2 else None
+            return ids.astype(np.int64) if ids is not None else np.array([], dtype=np.int64)
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            ids = self.postings.get(gram)
+            if ids is None:
+                return np.array([], dtype=np.int64)
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        return np.array([i for i in candidates if query in self.keys[i]], dtype=np.int64)
+
+    def _best(self, ids, limit):
+        return ids[top_k_indices(self.weights[ids], limit)]
+
+    # Prefix matches first, then substring matches, each ranked by weight
+    def suggest(self, partial, limit=10):
+        query = fold_text(partial)
+        if not query or limit <= 0:
+            return []
+        start = bisect.bisect_left(self.keys, query)
+        end = bisect.bisect_left(self.keys, query + '\uffff', lo=start)
+        found = list(self._best(np.arange(start, end), limit))
+        if len(found) < limit:
+            candidates = self._containing(query)
+            candidates = candidates[(candidates < start) | (candidates >= end)]
+            found.extend(self._best(candidates, limit - len(found)))
+        return [self.entries[i] for i in found]
+
+
+# Cast inverted index
+def normalize_name(name):
+    return ' '.join(name.split()).casefold()
+
+class CastIndex:
+    # Trigram postings of the names, built by the first substring lookup (a class default, so indexes
+    # pickled before it existed load too)
+    _trigrams = None
+
+    # Inverted index: normalized actor name -> movie row ids, stored as CSR (indptr/int32 indices)
+    def __init__(self, dataframe):
+        rows, ids, self.names, spellings = token_pairs(dataframe['cast'], normalize_name)
+        # Spelling as it first appears in the catalog, for display
+        self.display_names = spellings
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self._set_postings(rows, ids)
+
+    def _set_postings(self, rows, ids):
+        order = np.lexsort((rows, ids))
+        self.indices = rows[order].astype(np.int32)
+        self.indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum(np.bincount(ids, minlength=len(self.names)))
+
+    # Copy with the postings of the given rows replaced by their names in the updated catalog
+    def updated(self, dataframe, rows):
+        changed = np.zeros(len(dataframe), dtype=bool)
+        changed[rows] = True
+        keep = ~changed[self.indices]
+        new_rows, new_ids, keys, spellings = token_pairs(dataframe['cast'].iloc[rows], normalize_name)
+
+        index = copy.copy(self)
+        ids = np.repeat(np.arange(len(self.names)), np.diff(self.indptr))[keep]
+        unseen = [name for name in keys if name not in self.positions]
+        if unseen:
+            index.names = sorted(self.names + unseen)
+            index.positions = {name: i for i, name in enumerate(index.names)}
+            index._trigrams = None
+            display_names = dict(zip(keys, spellings))
+            display_names.update(zip(self.names, self.display_names))
+            index.display_names = [display_names[name] for name in index.names]
+            ids = np.fromiter((index.positions[name] for name in self.names), dtype=np.int64,
+                              count=len(self.names))[ids]
+        new_ids = np.array([index.positions[name] for name in keys], dtype=np.int64)[new_ids]
+        index._set_postings(np.concatenate([self.indices[keep], np.asarray(rows)[new_rows]]),
+                            np.concatenate([ids, new_ids]))
+        return index
+
+    # Name ids matching the query; mode is 'exact', 'prefix', 'substring' or 'auto' (first that matches)
+    def lookup(self, name, mode='auto'):
+        name = normalize_name(name)
+        if not name:
+            return []
+        if mode in ('exact', 'auto') and name in self.positions:
+            return [self.positions[name]]
+        if mode in ('prefix', 'auto'):
+            start = bisect.bisect_left(self.names, name)
+            end = bisect.bisect_left(self.names, name + '\uffff', lo=start)
+            if end > start or mode == 'prefix':
+                return list(range(start, end))
+        if mode in ('substring', 'auto'):
+            if self._trigrams is None:
+                self._trigrams = trigram_postings(self.names)
+            return [i for i in substring_candidates(self._trigrams, name).tolist() if name in self.names[i]]
+        return []
+
+    def rows(self, name_ids):
+        if not name_ids:
+            return np.array([], dtype=np.int32)
+        return np.unique(np.concatenate([self.indices[self.indptr[i]:self.indptr[i + 1]] for i in name_ids]))
+
+
+# Genre/keyword token matrices for Jaccard similarity
+def build_token_matrix(column):
+    from scipy.sparse import csr_matrix
+    rows, ids, vocabulary, _ = token_pairs(column)
+    indptr = np.zeros(len(column) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=len(column)))
+    return csr_matrix((np.ones(len(ids), dtype=np.float32), ids.astype(np.int32), indptr),
+                      shape=(len(column), len(vocabulary)))
+
+class SimilarityIndex:
+    # Genres and keywords encoded once as sparse binary matrices (one row per movie)
+    def __init__(self, dataframe):
+        self.genres = build_token_matrix(dataframe['genres'])
+        self.keywords = build_token_matrix(dataframe['keywords'])
+        self.genre_sizes = np.diff(self.genres.indptr)
+        self.keyword_sizes = np.diff(self.keywords.indptr)
+
+    @staticmethod
+    def jaccard(matrix, sizes, row):
+        # |A ∩ B| for every movie with a single sparse product, |A ∪ B| from the row sizes
+        intersection = (matrix @ matrix[row].T).toarray().ravel()
+        union = sizes + sizes[row] - intersection
+        return np.divide(intersection, union, out=np.zeros(len(sizes)), where=union != 0)
+
+    def scores(self, row):
+        genre_score = self.jaccard(self.genres, self.genre_sizes, row)
+        keyword_score = self.jaccard(self.keywords, self.keyword_sizes, row)
+        return genre_score * 0.5 + keyword_score * 0.5
+
+
+# Item feature matrix for taste profiles: one column per genre, keyword, cast member and director,
+# named like 'genre:drama'. Each block adds up to its weight per movie, split over the movie's tokens.
+class TasteIndex:
+    block_weights = {'genre': 1.0, 'keyword': 0.5, 'cast': 0.75, 'director': 1.0}
+
+    def __init__(self, dataframe):
+        from scipy.sparse import csr_matrix
+        size = len(dataframe)
+        rows, ids, values, self.names = [], [], [], []
+        for block, column, key in (('genre', 'genres', str.lower), ('keyword', 'keywords', None),
+                                   ('cast', 'cast', normalize_name)):
+            block_rows, block_ids, keys, _ = token_pairs(dataframe[column], key)
+            tokens = np.bincount(block_rows, minlength=size)
+            rows.append(block_rows)
+            ids.append(block_ids + len(self.names))
+            values.append(self.block_weights[block] / tokens[block_rows])
+            self.names += [f"{block}:{name}" for name in keys]
+        directors = pd.Categorical(dataframe['directors'])
+        codes = directors.codes.astype(np.int64)
+        rows.append(np.flatnonzero(codes >= 0))
+        ids.append(codes[codes >= 0] + len(self.names))
+        values.append(np.full(len(rows[-1]), self.block_weights['director']))
+        self.names += [f"director:{name}" for name in directors.categories]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.matrix = csr_matrix((np.concatenate(values).astype(np.float32),
+                                  (np.concatenate(rows), np.concatenate(ids))), shape=(size, len(self.names)))
+        # First row of each title, to record a viewed result
+        titles = dataframe['title'].to_numpy()
+        self.title_rows = dict(zip(titles[::-1], range(size - 1, -1, -1)))
+
+    # {feature name: value} of one movie; O(its tokens)
+    def features(self, row):
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        return {self.names[i]: float(value) for i, value in zip(self.matrix.indices[start:end],
+                                                                  self.matrix.data[start:end])}
+
+    # Profile affinity of every movie: one sparse matrix-vector product
+    def scores(self, weights):
+        vector = np.zeros(len(self.names), dtype=np.float32)
+        for name, weight in weights.items():
+            i = self.positions.get(name)
+            if i is not None:
+                vector[i] = weight
+        return self.matrix @ vector
+
+
+# TF-IDF index over overview, keywords and tagline
+def combined_text(dataframe):
+    keywords = join_tokens(dataframe['keywords'])
+    overview = dataframe['overview'].fillna('').astype(str)
+    tagline = dataframe['tagline'].fillna('').astype(str)
+    return overview + " " + keywords + " " + tagline
+
+
+# Shared by the fitted vectorizer and the per-chunk counts of the ingest pipeline
+TFIDF_OPTIONS = {'stop_words': 'english', 'dtype': np.float32}
+
+
+class TfidfIndex:
+    # Fitted vectorizer and CSR tf-idf matrix, persisted under INDEX_DIR keyed by a hash of the corpus
+    def __init__(self, vectorizer, matrix, version=None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        # Content hash of the corpus, used to key derived indexes
+        self.version = version
+
+    @staticmethod
+    def content_hash(text):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(text, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def build(cls, dataframe):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        vectorizer = TfidfVectorizer(**TFIDF_OPTIONS)
+        text = combined_text(dataframe)
+        matrix = vectorizer.fit_transform(text).tocsr()
+        return cls(vectorizer, matrix, cls.content_hash(text))
+
+    # Vectorizer over a sorted vocabulary with the IDF weights of its document frequencies, for term
+    # counts merged outside the vectorizer as the ingest pipeline does per chunk (smooth idf, as fit)
+    @staticmethod
+    def fitted_vectorizer(vocabulary, document_frequency, documents):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        vectorizer = TfidfVectorizer(**TFIDF_OPTIONS)
+        vectorizer.vocabulary_ = {term: i for i, term in enumerate(vocabulary)}
+        frequency = np.asarray(document_frequency, dtype=TFIDF_OPTIONS['dtype'])
+        vectorizer.idf_ = np.log((documents + 1) / (frequency + 1)) + 1
+        return vectorizer
+
+    # Rows of term counts over the vectorizer's vocabulary weighted as fit_transform does: idf, l2-normalized
+    @staticmethod
+    def weigh(counts, vectorizer):
+        from scipy.sparse import csr_matrix
+        from sklearn.preprocessing import normalize
+        return normalize(csr_matrix(counts.multiply(vectorizer.idf_))).astype(counts.dtype)
+
+    @classmethod
+    def load_or_build(cls, dataframe, directory=INDEX_DIR):
+        import joblib
+        version = cls.content_hash(combined_text(dataframe))
+        path = os.path.join(directory, f"tfidf-{version}.joblib")
+        if os.path.exists(path):
+            try:
+                return cls(*joblib.load(path), version)
+            except Exception:
+                pass
+        index = cls.build(dataframe)
+        index.save(directory)
+        return index
+
+    def save(self, directory=INDEX_DIR):
+        import joblib
+        path = os.path.join(directory, f"tfidf-{self.version}.joblib")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            for stale in glob.glob(os.path.join(directory, "tfidf-*.joblib")):
+                os.remove(stale)
+            joblib.dump((self.vectorizer, self.matrix), path + ".tmp")
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+    # Copy with the given rows re-vectorized against the fitted vocabulary and IDF weights.
+    # The next full load refits, so terms first seen in a delta only count from then on.
+    def updated(self, dataframe, rows):
+        from scipy.sparse import vstack
+        text = combined_text(dataframe.iloc[rows])
+        order = np.arange(len(dataframe))
+        order[rows] = self.matrix.shape[0] + np.arange(len(rows))
+        matrix = vstack([self.matrix, self.vectorizer.transform(text)]).tocsr()[order]
+        digest = hashlib.sha256(f"{self.version}:{self.content_hash(text)}".encode() + np.asarray(rows).tobytes())
+        return TfidfIndex(self.vectorizer, matrix, digest.hexdigest()[:16])
+
+    def scores(self, keyword):
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        keyword_vector = self.vectorizer.transform([keyword])
+        return (self.matrix @ keyword_vector.T).toarray().ravel()
@@ -0,0 +1,552 @@
+import csv
+import fcntl
+import hashlib
+import io
+import json
+import os
+import sys
+import unicodedata
+import urllib.error
+import urllib.request
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .config import DATA_URL, META_PATH, POSTER_BASE_URL, SNAPSHOT_PATH
+from .metrics import count, timed
+
+LIST_COLUMNS = ['genres', 'keywords', 'cast']
+CATEGORY_COLUMNS = ['original_language', 'directors']
+TEXT_COLUMNS = ['overview', 'tagline']
+NUMERIC_DTYPES = {'id': 'int32', 'numVotes': 'float32'}
+# Bumped when ingestion changes what a snapshot holds, so older snapshots are rebuilt (2: duplicates collapsed)
+SNAPSHOT_FORMAT = 2
+
+# Arrow-backed strings with NaN for missing values (the default 'str' dtype from pandas 3 on)
+try:
+    TEXT_DTYPE = pd.StringDtype('pyarrow', na_value=np.nan)
+except TypeError:
+    TEXT_DTYPE = pd.StringDtype('pyarrow_numpy')
+
+
+# Download the source CSV; returns (None, etag) when the server reports it unchanged
+def fetch_source(source=DATA_URL, etag=None, timeout=10):
+    if os.path.exists(source):
+        with open(source, 'rb') as f:
+            return f.read(), None
+    request = urllib.request.Request(source)
+    if etag:
+        request.add_header('If-None-Match', etag)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read(), response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, etag
+        raise
+
+
+# Stream the source CSV to a local file while hashing it, so large dumps never sit in memory.
+# Returns (path, sha256, etag), or (None, None, etag) when the server reports it unchanged;
+# local files are hashed in place.
+def download_source(source, path, etag=None, timeout=10, block_size=1 << 20):
+    digest = hashlib.sha256()
+    if os.path.exists(source):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return source, digest.hexdigest(), None
+    request = urllib.request.Request(source)
+    if etag:
+        request.add_header('If-None-Match', etag)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response, open(path + ".tmp", 'wb') as f:
+            for block in iter(lambda: response.read(block_size), b''):
+                digest.update(block)
+                f.write(block)
+            etag = response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, None, etag
+        raise
+    os.replace(path + ".tmp", path)
+    return path, digest.hexdigest(), etag
+
+
+# Split comma separated values into clean token lists
+def tokenize(series):
+    tokens = series.astype(object).where(series.notna(), '').astype(str).str.split(',').explode().str.strip()
+    tokens = tokens[tokens.astype(bool)]
+    grouped = tokens.groupby(level=0).agg(list)
+    return grouped.reindex(series.index).apply(lambda x: x if isinstance(x, list) else [])
+
+
+# Same tokens as tokenize for an Arrow string array, as list<string> (nulls become empty lists)
+def split_token_lists(array):
+    lists = pc.split_pattern(array.fill_null(''), ',')
+    tokens = pc.utf8_trim_whitespace(lists.flatten())
+    keep = pc.greater(pc.utf8_length(tokens), 0)
+    parents = pc.list_parent_indices(lists).to_numpy()
+    offsets = np.zeros(len(array) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum(np.bincount(parents[keep.to_numpy(zero_copy_only=False)], minlength=len(array)))
+    return pa.ListArray.from_arrays(pa.array(offsets), tokens.filter(keep))
+
+
+TURKISH_FOLD = str.maketrans({'ı': 'i', 'İ': 'i', 'ş': 's', 'Ş': 's', 'ğ': 'g', 'Ğ': 'g',
+                              'ç': 'c', 'Ç': 'c', 'ö': 'o', 'Ö': 'o', 'ü': 'u', 'Ü': 'u'})
+
+# Case, accent and whitespace insensitive form of a name or title
+def fold_text(text):
+    text = unicodedata.normalize('NFKD', str(text).translate(TURKISH_FOLD).casefold())
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def split_tokens(value):
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, (list, tuple, np.ndarray)):
+        return []
+    return [token.strip() for token in value if isinstance(token, str) and token.strip()]
+
+
+# Token list columns (genres, keywords, cast) are held as Arrow list<dictionary<int32, string>>:
+# int32 offsets per movie, one int32 id per token and a single shared vocabulary.
+def is_token_column(values):
+    dtype = getattr(values, 'dtype', None)
+    return (isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype)
+            and pa.types.is_dictionary(dtype.pyarrow_dtype.value_type))
+
+
+def token_column(offsets, ids, vocabulary, index=None):
+    tokens = pa.DictionaryArray.from_arrays(pa.array(ids, pa.int32()), pa.array(vocabulary, pa.string()))
+    array = pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), tokens)
+    return pd.Series(pd.arrays.ArrowExtensionArray(array), index=index)
+
+
+# Dictionary-encode an Arrow list<string> column
+def encode_tokens(array):
+    array = array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+    tokens = array.flatten()
+    if pa.types.is_null(tokens.type):
+        tokens = tokens.cast(pa.string())
+    if not pa.types.is_dictionary(tokens.type):
+        tokens = tokens.dictionary_encode()
+    return pa.ListArray.from_arrays(pc.subtract(array.offsets, array.offsets[0]), tokens)
+
+
+def _token_array(values):
+    array = pa.array(values.array)
+    return array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+
+
+# Flat (offsets, ids, vocabulary) view of a token column: zero-copy for the Arrow layout,
+# built with a dictionary for lists or comma separated strings
+def token_arrays(values):
+    if is_token_column(values):
+        array = _token_array(values)
+        offsets = array.offsets.to_numpy()
+        ids = array.values.indices.to_numpy()[offsets[0]:offsets[-1]]
+        return offsets - offsets[0], ids, array.values.dictionary.to_pylist()
+    lookup = {}
+    lengths = []
+    ids = []
+    for value in values:
+        tokens = split_tokens(value)
+        lengths.append(len(tokens))
+        ids.extend(lookup.setdefault(token, len(lookup)) for token in tokens)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    return offsets, np.asarray(ids, dtype=np.int32), list(lookup)
+
+
+# Tokens of every movie joined into one string
+def join_tokens(values, sep=' '):
+    if is_token_column(values):
+        array = _token_array(values)
+        decoded = pa.ListArray.from_arrays(array.offsets, array.values.dictionary_decode())
+        return pd.Series(pc.binary_join(decoded, sep).to_numpy(zero_copy_only=False), index=values.index)
+    return values.apply(lambda x: sep.join(split_tokens(x)))
+
+
+# Token column of size rows: rows keep their tokens except the given ones, which get replacements
+def patch_tokens(values, size, rows, replacements, index=None):
+    offsets, ids, vocabulary = token_arrays(values)
+    lookup = {token: i for i, token in enumerate(vocabulary)}
+    starts = np.zeros(size, dtype=np.int64)
+    lengths = np.zeros(size, dtype=np.int64)
+    starts[:len(offsets) - 1] = offsets[:-1]
+    lengths[:len(offsets) - 1] = np.diff(offsets)
+    added = []
+    for row, value in zip(rows, replacements):
+        tokens = split_tokens(value)
+        starts[row] = len(ids) + len(added)
+        lengths[row] = len(tokens)
+        added.extend(lookup.setdefault(token, len(lookup)) for token in tokens)
+    pool = np.concatenate([ids, np.asarray(added, dtype=ids.dtype)])
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+    return token_column(offsets, pool[gather], list(lookup), index)
+
+
+# Daily delta: any subset of the catalog columns, rows keyed by movie id. Rows with more fields than
+# the header or without an integer id are counted as delta_rejected, as at ingest, and fail the whole
+# delta: a partly applied upsert could not be told apart from a complete one.
+def parse_delta(body):
+    with warnings.catch_warnings():
+        # Extra fields are dropped here and counted below
+        warnings.simplefilter('ignore', pd.errors.ParserWarning)
+        df = pd.read_csv(io.BytesIO(body), dtype={'id': str}, index_col=False, on_bad_lines="skip")
+    if 'id' not in df.columns:
+        raise ValueError("'id' kolonu bulunamadı. Lütfen verinizi kontrol edin.")
+    # pandas truncates or skips such rows without telling; the csv module keeps every field
+    rows = csv.reader(io.StringIO(body.decode('utf-8-sig')))
+    fields = len(next(rows, []))
+    ids = pd.to_numeric(df['id'].str.strip(), errors='coerce')
+    rejected = {'malformed': sum(len(row) > fields for row in rows), 'id': int((ids.isna() | (ids % 1 != 0)).sum())}
+    for reason, value in rejected.items():
+        if value:
+            count('delta_rejected', value, reason=reason)
+    if any(rejected.values()):
+        raise ValueError(f"Geçersiz satırlar: {rejected['id']} satırda id eksik ya da tam sayı değil, "
+                         f"{rejected['malformed']} satır bozuk. Lütfen verinizi kontrol edin.")
+    return normalize_columns(df.assign(id=ids))
+
+
+# Delta columns in catalog form. Blank cells stay missing, so merge_delta keeps the current value
+def normalize_columns(df):
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = tokenize(df[column]).where(df[column].notna())
+    for column in TEXT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(TEXT_DTYPE)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column, dtype in NUMERIC_DTYPES.items():
+        if column in df.columns and (dtype.startswith('float') or not df[column].isna().any()):
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+    return df
+
+
+def _folded(values):
+    codes, uniques = pd.factorize(values.astype(object))
+    folded = np.array([''] + [fold_text(value) for value in uniques], dtype=object)
+    return folded[codes + 1]
+
+
+# Release year of each row as 'YYYY', '' when unknown
+def release_years(df):
+    if 'release_date' not in df.columns:
+        return np.full(len(df), '', dtype=object)
+    dates = df['release_date'].astype(object)
+    year = dates.where(dates.notna(), '').astype(str).str[:4]
+    return np.where(year.str.fullmatch(r'\d{4}').to_numpy(dtype=bool), year.to_numpy(dtype=object), '')
+
+
+# Identity of each movie for duplicate detection: 64-bit blocking keys of (folded title, year) and
+# (folded original title, year), the folded director's hash (0 when unknown), whether the year is known
+# and the vote count. Rows without a title get key 0 and never match.
+def identity_keys(df):
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+
+    year = release_years(df)
+    dated = year != ''
+
+    def hashed(values, suffix=None):
+        folded = _folded(values)
+        keys = pd.util.hash_array(folded + '\x1f' + suffix if suffix is not None else folded)
+        keys[folded == ''] = 0
+        return keys
+
+    return pd.DataFrame({
+        'title': hashed(column('title'), year),
+        'original': hashed(column('original_title'), year),
+        'director': hashed(column('directors')),
+        'dated': dated,
+        'votes': pd.to_numeric(column('numVotes'), errors='coerce').fillna(-1).to_numpy(dtype=np.float64),
+    })
+
+
+# Canonical row of every row of an identity frame. Rows are only compared within blocks sharing a title
+# key (title or original title, plus year), so the cost is linear in the catalog. Inside a block rows are
+# the same film when they have the same director, or when the year is known and at most one director is.
+# Each film maps to its row with the most votes, ties to the first row.
+def canonical_rows(identity):
+    size = len(identity)
+    keys = np.concatenate([identity['title'].to_numpy(), identity['original'].to_numpy()])
+    rows = np.tile(np.arange(size), 2)
+    keys, rows = keys[keys != 0], rows[keys != 0]
+    order = np.lexsort((rows, keys))
+    keys, rows = keys[order], rows[order]
+    distinct = np.ones(len(keys), dtype=bool)
+    distinct[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+    keys, rows = keys[distinct], rows[distinct]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(keys)].astype(np.int64)
+
+    parent = np.arange(size)
+    directors = identity['director'].to_numpy()
+    dated = identity['dated'].to_numpy()
+
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    blocks = ends - starts > 1
+    for start, end in zip(starts[blocks], ends[blocks]):
+        members = rows[start:end]
+        by_director = {}
+        for row, director in zip(members, directors[members]):
+            if director:
+                by_director.setdefault(director, []).append(row)
+        groups = [members] if dated[members[0]] and len(by_director) <= 1 else by_director.values()
+        for group in groups:
+            root = find(group[0])
+            for row in group[1:]:
+                parent[find(row)] = root
+    while True:
+        roots = parent[parent]
+        if (roots == parent).all():
+            break
+        parent = roots
+
+    order = np.lexsort((np.arange(size), -identity['votes'].to_numpy(), parent))
+    first = np.r_[True, parent[order][1:] != parent[order][:-1]] if size else np.array([], dtype=bool)
+    representative = np.empty(size, dtype=np.int64)
+    representative[parent[order][first]] = order[first]
+    return representative[parent]
+
+
+# Catalog row of each delta row and the id it is stored under. A delta id is first mapped through
+# aliases (ids collapsed into another movie); a new id may still match an existing movie's identity,
+# which is then updated under its catalog id. -1 marks new movies, -2 duplicates of another new row.
+def resolve_delta_rows(catalog, delta, aliases=None):
+    ids = delta['id'].to_numpy()
+    if aliases:
+        ids = np.fromiter((aliases.get(i, i) for i in ids.tolist()), dtype=ids.dtype, count=len(ids))
+    positions = pd.Index(catalog['id']).get_indexer(ids)
+    ids = np.where(positions >= 0, catalog['id'].to_numpy()[np.maximum(positions, 0)], ids)
+    new = np.flatnonzero(positions < 0)
+    if not len(new) or 'title' not in delta.columns:
+        return positions, ids
+    added = identity_keys(delta.iloc[new])
+    # Only catalog movies from the same years can share a title key; hash just those
+    candidates = np.flatnonzero(np.isin(release_years(catalog), list(set(release_years(delta.iloc[new])))))
+    existing = identity_keys(catalog.iloc[candidates])
+    titles = added[['title', 'original']].to_numpy().ravel()
+    matching = np.isin(existing['title'], titles) | np.isin(existing['original'], titles)
+    candidates, existing = candidates[matching], existing[matching].assign(votes=np.inf)
+    canonical = canonical_rows(pd.concat([existing, added], ignore_index=True))
+    targets = ids.copy()
+    for i, row in enumerate(new):
+        target = canonical[len(existing) + i]
+        if target < len(existing):
+            positions[row] = candidates[target]
+            targets[row] = catalog['id'].iat[candidates[target]]
+        elif target != len(existing) + i:
+            positions[row] = -2
+            targets[row] = ids[new[target - len(existing)]]
+    return positions, targets
+
+
+# Upsert delta rows by movie id. Updated movies keep their row position and new ones are appended,
+# so positional indexes only need to revisit the returned rows; blank cells of an update keep the
+# movie's values. New movies without a title are rejected, as at ingest, and counted as delta_rejected.
+# Returns the merged catalog, the changed rows and the aliases extended by the delta ids that resolved
+# to another movie's id.
+def merge_delta(catalog, delta, aliases=None):
+    delta = delta.drop_duplicates('id', keep='last')
+    positions, ids = resolve_delta_rows(catalog, delta, aliases)
+    titled = (delta['title'].fillna('').astype(str).str.strip().astype(bool).to_numpy(dtype=bool)
+              if 'title' in delta.columns else np.zeros(len(delta), dtype=bool))
+    untitled = (positions == -1) & ~titled
+    if untitled.any():
+        count('delta_rejected', int(untitled.sum()), reason='title')
+    aliases = dict(aliases or {})
+    collapsed = ~untitled & (ids != delta['id'].to_numpy())
+    aliases.update(zip(delta['id'].to_numpy()[collapsed].tolist(), ids[collapsed].tolist()))
+    delta = delta.assign(id=ids)
+    # Duplicates collapse into the movie they match; the last row for a movie wins
+    last = ~pd.Series(positions).duplicated(keep='last').to_numpy()
+    keep = ((positions == -1) & titled) | ((positions >= 0) & last)
+    delta, positions = delta[keep].reset_index(drop=True), positions[keep]
+    updated = positions >= 0
+    token_columns = [column for column in LIST_COLUMNS if column in catalog.columns]
+    columns = [column for column in delta.columns if column in catalog.columns and column not in token_columns]
+    categories = [column for column in CATEGORY_COLUMNS if column in catalog.columns]
+    merged = pd.concat([catalog.drop(columns=token_columns).astype({column: object for column in categories}),
+                        delta.loc[~updated, columns].astype({c: object for c in categories if c in columns})],
+                       ignore_index=True)
+    # Blank cells of an update leave the movie's value as it is
+    for column in columns:
+        values = merged[column].to_numpy(dtype=object if column in categories else None, copy=True)
+        given = delta.loc[updated, column]
+        present = given.notna().to_numpy()
+        values[positions[updated][present]] = given[present].to_numpy(dtype=values.dtype)
+        merged[column] = values
+    inserted = np.arange(len(catalog), len(merged))
+    for column in token_columns:
+        if column in delta.columns:
+            given = delta.loc[updated, column]
+            present = given.notna().to_numpy()
+            rows = np.concatenate([positions[updated][present], inserted])
+            replacements = np.concatenate([given[present].to_numpy(dtype=object),
+                                           delta.loc[~updated, column].to_numpy(dtype=object)])
+        else:
+            rows, replacements = inserted, [[]] * len(inserted)
+        merged[column] = patch_tokens(catalog[column], len(merged), rows, replacements, merged.index)
+    # Inserted rows may leave columns out of the delta
+    for column in TEXT_COLUMNS:
+        if column in merged.columns:
+            merged[column] = merged[column].fillna('').astype(str)
+    for column in categories:
+        merged[column] = merged[column].astype('category')
+    merged = merged.astype({column: dtype for column, dtype in catalog.dtypes.items() if column in NUMERIC_DTYPES
+                            and (dtype.kind == 'f' or not merged[column].isna().any())})
+    return merged[catalog.columns], np.concatenate([np.sort(positions[updated]), inserted]), aliases
+
+
+# Content hash of a catalog (or delta) frame
+def catalog_version(df):
+    columns = {column: join_tokens(df[column], ',') if column in LIST_COLUMNS else df[column]
+               for column in df.columns}
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def poster_urls(backdrop_path):
+    with timed('results', 'poster_urls'):
+        poster_url = (POSTER_BASE_URL + backdrop_path).astype(object)
+        poster_url[backdrop_path.isna()] = None
+    return poster_url
+
+
+def write_snapshot(df, meta, path=SNAPSHOT_PATH, meta_path=META_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path + ".tmp")
+    os.replace(path + ".tmp", path)
+    write_meta(meta, meta_path)
+
+
+def read_meta(meta_path=META_PATH):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_meta(meta, meta_path=META_PATH):
+    with open(meta_path + ".tmp", 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+# Meta file of a snapshot, e.g. data/movies.meta.json for data/movies.parquet
+def snapshot_meta_path(path):
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+# {source id: canonical id} of the movies collapsed into another one, at ingest or by a delta
+def read_aliases(meta_path=META_PATH):
+    return {int(source): int(target) for source, target in read_meta(meta_path).get('aliases', {}).items()}
+
+
+# Catalog frame in the compact layout: Arrow strings, categoricals, downcast numbers and
+# dictionary-encoded token columns. Poster URLs are built per result row (poster_urls).
+def snapshot_frame(table):
+    text_types = {pa.string(): TEXT_DTYPE, pa.large_string(): TEXT_DTYPE}
+    df = table.drop([c for c in LIST_COLUMNS if c in table.column_names]).to_pandas(
+        types_mapper=text_types.get, ignore_metadata=True)
+    for column in LIST_COLUMNS:
+        if column in table.column_names:
+            df[column] = pd.Series(pd.arrays.ArrowExtensionArray(encode_tokens(table.column(column))),
+                                   index=df.index)
+    return df[table.column_names]
+
+
+# Read the snapshot memory-mapped
+def read_snapshot(path=SNAPSHOT_PATH):
+    return snapshot_frame(pq.read_table(path, memory_map=True))
+
+
+# Refresh the snapshot when the source changed (ETag/sha256), then load it. The CSV is streamed to
+# disk and ingested in chunks (inka.pipeline); the meta records kept, duplicate and rejected row counts.
+# Network failures fall back to the existing snapshot so the app keeps working offline.
+def refresh_snapshot(source=DATA_URL, path=SNAPSHOT_PATH, meta_path=META_PATH, force=False, timeout=10,
+                     workers=None):
+    from .pipeline import ingest_csv
+    meta = read_meta(meta_path)
+    exists = os.path.exists(path)
+    current = exists and not force and meta.get('format') == SNAPSHOT_FORMAT
+    download = os.path.splitext(path)[0] + ".csv"
+    try:
+        csv_path, digest, etag = download_source(source, download, meta.get('etag') if current else None, timeout)
+    except (urllib.error.URLError, OSError, TimeoutError):
+        if exists:
+            return False
+        raise
+    if csv_path is None:
+        return False
+    try:
+        if current and digest == meta.get('sha256'):
+            if etag != meta.get('etag'):
+                write_meta(dict(meta, etag=etag), meta_path)
+            return False
+        report = ingest_csv(csv_path, path, workers=workers)
+        write_meta(dict(report, source=source, etag=etag, sha256=digest, format=SNAPSHOT_FORMAT), meta_path)
+    finally:
+        if csv_path == download:
+            os.remove(download)
+    return True
+
+
+def load_snapshot(source=DATA_URL, path=SNAPSHOT_PATH, meta_path=META_PATH, refresh=True, timeout=5):
+    if refresh or not os.path.exists(path):
+        with timed('load', 'refresh'):
+            refresh_snapshot(source, path, meta_path, timeout=timeout)
+    with timed('load', 'read'):
+        return read_snapshot(path)
+
+
+# Exclusive lock across processes on path + '.lock', held while a delta is merged into a persisted catalog
+@contextmanager
+def file_lock(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# Merge a delta CSV into the local snapshot
+def apply_delta(source, path=SNAPSHOT_PATH, meta_path=META_PATH):
+    body, _ = fetch_source(source)
+    with file_lock(path):
+        catalog, rows, aliases = merge_delta(read_snapshot(path), parse_delta(body), read_aliases(meta_path))
+        meta = dict(read_meta(meta_path), aliases=aliases, delta_sha256=hashlib.sha256(body).hexdigest())
+        write_snapshot(catalog, meta, path, meta_path)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--delta':
+        print(f"{SNAPSHOT_PATH}: {apply_delta(sys.argv[2])} film eklendi/güncellendi")
+        sys.exit()
+    source = sys.argv[1] if len(sys.argv) > 1 else DATA_URL
+    updated = refresh_snapshot(source, force=True)
+    meta = read_meta()
+    print(f"{SNAPSHOT_PATH}: {'güncellendi' if updated else 'değişmedi'} ({meta.get('sha256')}), "
+          f"{meta.get('rows')} film, reddedilen satırlar: {meta.get('rejected')}")
@@ -0,0 +1,152 @@
+# In-process hot-path metrics: stage timers and counters, exported as Prometheus text or JSON log lines.
+#
+#   with timed('genre', 'score'):
+#       ...
+#   count('cache_hits', cache='api')
+#
+# Set INKA_METRICS_LOG=1 to also log every timing as one JSON line on the 'inka.metrics' logger.
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger('inka.metrics')
+
+
+# perf_counter() reading at process start, from the process start time in /proc where there is one;
+# elsewhere the time this module is imported stands in for it
+def process_started():
+    now = time.perf_counter()
+    try:
+        with open('/proc/self/stat') as f:
+            ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return now
+    return now - max(age, 0.0)
+
+
+class Metrics:
+    # Percentiles are computed over the most recent timings of each stage
+    recent_size = 512
+
+    def __init__(self, log=None):
+        self.log = os.environ.get('INKA_METRICS_LOG') == '1' if log is None else log
+        self._timers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.started = process_started()
+        self._milestones = set()
+
+    def observe(self, component, stage, seconds):
+        with self._lock:
+            timer = self._timers.get((component, stage))
+            if timer is None:
+                timer = self._timers[(component, stage)] = [0, 0.0, deque(maxlen=self.recent_size)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2].append(seconds)
+        if self.log:
+            logger.info(json.dumps({'component': component, 'stage': stage, 'ms': round(seconds * 1000, 3)}))
+
+    @contextmanager
+    def timed(self, component, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(component, stage, time.perf_counter() - start)
+
+    # Seconds from process start (or `since`) to the first time a startup milestone is reached, recorded
+    # as ('startup', milestone), e.g. 'imports' or 'first_result'; later calls are ignored
+    def startup(self, milestone, since=None):
+        with self._lock:
+            if milestone in self._milestones:
+                return
+            self._milestones.add(milestone)
+        self.observe('startup', milestone, time.perf_counter() - (self.started if since is None else since))
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    # One row per (component, stage): totals since start plus percentiles of the recent timings
+    def summary(self):
+        with self._lock:
+            timers = [(key, count, total, np.array(recent)) for key, (count, total, recent) in self._timers.items()]
+        return [{'component': component, 'stage': stage, 'count': count,
+                 'mean_ms': total / count * 1000,
+                 'p50_ms': float(np.percentile(recent, 50)) * 1000,
+                 'p95_ms': float(np.percentile(recent, 95)) * 1000,
+                 'last_ms': float(recent[-1]) * 1000}
+                for (component, stage), count, total, recent in sorted(timers)]
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    # {cache: (hits, misses, hit rate)} from the cache_hits / cache_misses counters
+    def hit_rates(self):
+        totals = {}
+        for (name, labels), value in self.counters().items():
+            if name in ('cache_hits', 'cache_misses'):
+                cache = dict(labels).get('cache', '')
+                hits, misses = totals.get(cache, (0, 0))
+                totals[cache] = (hits + value, misses) if name == 'cache_hits' else (hits, misses + value)
+        return {cache: (hits, misses, hits / (hits + misses) if hits + misses else 0.0)
+                for cache, (hits, misses) in sorted(totals.items())}
+
+    def to_prometheus(self):
+        lines = ["# TYPE inka_stage_seconds summary"]
+        for row in self.summary():
+            labels = f'component="{row["component"]}",stage="{row["stage"]}"'
+            lines += [f'inka_stage_seconds{{{labels},quantile="0.5"}} {row["p50_ms"] / 1000:.6f}',
+                      f'inka_stage_seconds{{{labels},quantile="0.95"}} {row["p95_ms"] / 1000:.6f}',
+                      f'inka_stage_seconds_sum{{{labels}}} {row["mean_ms"] * row["count"] / 1000:.6f}',
+                      f'inka_stage_seconds_count{{{labels}}} {row["count"]}']
+        by_name = {}
+        for (name, labels), value in sorted(self.counters().items()):
+            by_name.setdefault(name, []).append((labels, value))
+        for name, values in by_name.items():
+            lines.append(f"# TYPE inka_{name}_total counter")
+            for labels, value in values:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f"inka_{name}_total{{{label_text}}} {value}" if label_text
+                             else f"inka_{name}_total {value}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
+timed = metrics.timed
+count = metrics.count
+startup = metrics.startup
+
+_profile_lock = threading.Lock()
+
+
+# Opt-in profiling of a single call; returns (result, cProfile report sorted by cumulative time).
+# Calls are serialized because only one profiler can be active at a time.
+def profile(function, *args, limit=30, **kwargs):
+    with _profile_lock:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function, *args, **kwargs)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return result, stream.getvalue()
@@ -0,0 +1,273 @@
+# Out-of-core ingestion: the source CSV is parsed in blocks, and a process pool validates,
+# tokenizes and counts TF-IDF terms per chunk while the snapshot is written one row group per
+# chunk. Only a bounded number of chunks is in flight; workers spill their term counts and row
+# hashes to disk, so the parent keeps just the identity keys of every row (about 40 bytes per movie).
+# Exact and near-duplicate rows of a movie are collapsed into one canonical row (ingest.canonical_rows)
+# by a second pass over the row groups, so recommenders never deduplicate per query.
+#
+#   python -m inka.ingest movies.csv        # refresh_snapshot runs ingest_csv
+#
+# The spilled counts are merged chunk by chunk into the TF-IDF index of the final snapshot and stored
+# under INDEX_DIR, where TfidfIndex.load_or_build finds it by content hash instead of refitting. Peak
+# memory is the in-flight chunks plus what grows with the input: the identity keys and that matrix.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from scipy.sparse import csr_matrix, load_npz, save_npz
+
+from .config import INDEX_DIR, SNAPSHOT_PATH
+from .indexes import TFIDF_OPTIONS, TfidfIndex, combined_text
+from .ingest import (CATEGORY_COLUMNS, LIST_COLUMNS, NUMERIC_DTYPES, TEXT_COLUMNS, canonical_rows, identity_keys,
+                     snapshot_frame, split_token_lists)
+from .metrics import count, timed
+
+BLOCK_BYTES = 16 << 20
+NUMBER_DTYPES = dict(NUMERIC_DTYPES, averageRating='float64', popularity='float64')
+TFIDF_COLUMNS = {'overview', 'keywords', 'tagline'}
+
+_schema = None
+_spill = None
+
+
+def csv_columns(source):
+    with pacsv.open_csv(source, read_options=pacsv.ReadOptions(block_size=1 << 16)) as reader:
+        return reader.schema.names
+
+
+# Fixed snapshot schema, so every chunk writes the same row group layout
+def snapshot_schema(names):
+    def arrow_type(name):
+        if name in LIST_COLUMNS:
+            return pa.list_(pa.string())
+        if name in CATEGORY_COLUMNS:
+            return pa.dictionary(pa.int32(), pa.string())
+        if name in NUMBER_DTYPES:
+            return pa.from_numpy_dtype(np.dtype(NUMBER_DTYPES[name]))
+        return pa.large_string()
+    return pa.schema([(name, arrow_type(name)) for name in names])
+
+
+# Typed snapshot table of a raw (all string) CSV block and the count of rejected rows by reason
+def clean_batch(batch, schema):
+    df = batch.to_pandas()
+    rejected = {}
+    keep = pd.Series(True, index=df.index)
+    if 'id' in df.columns:
+        ids = pd.to_numeric(df['id'], errors='coerce')
+        keep &= ids.notna() & (ids % 1 == 0)
+        rejected['id'] = int((~keep).sum())
+    if 'title' in df.columns:
+        titled = df['title'].fillna('').str.strip().astype(bool)
+        rejected['title'] = int((keep & ~titled).sum())
+        keep &= titled
+    df = df[keep.to_numpy()]
+
+    arrays = []
+    for field in schema:
+        values = df[field.name]
+        if field.name in LIST_COLUMNS:
+            array = split_token_lists(pa.array(values, pa.string()))
+        elif field.name in CATEGORY_COLUMNS:
+            array = pa.array(values, pa.string()).dictionary_encode()
+        elif field.name in NUMBER_DTYPES:
+            array = pa.array(pd.to_numeric(values, errors='coerce').astype(NUMBER_DTYPES[field.name]),
+                             field.type, from_pandas=True)
+        elif field.name in TEXT_COLUMNS:
+            array = pa.array(values.fillna(''), field.type)
+        else:
+            array = pa.array(values, field.type)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema), rejected
+
+
+def _init_worker(schema, spill):
+    global _schema, _spill
+    _schema, _spill = schema, spill
+
+
+def _spilled(spill, chunk, name):
+    return os.path.join(spill, f"{chunk}.{name}")
+
+
+# Worker: clean one block and key its movies' identities. With the TF-IDF columns present, its terms
+# are counted against a chunk-local vocabulary and spilled with the row hashes of
+# TfidfIndex.content_hash (order-preserving over chunks), so only the table goes back to the parent.
+def _process(chunk, batch):
+    table, rejected = clean_batch(batch, _schema)
+    frame = snapshot_frame(table)
+    if TFIDF_COLUMNS <= set(table.column_names):
+        terms, hashes = [], np.empty(0, np.uint64)
+        counts = csr_matrix((table.num_rows, 0), dtype=TFIDF_OPTIONS['dtype'])
+        if table.num_rows:
+            from sklearn.feature_extraction.text import CountVectorizer
+            text = combined_text(frame)
+            hashes = pd.util.hash_pandas_object(text, index=False).to_numpy()
+            vectorizer = CountVectorizer(**TFIDF_OPTIONS)
+            try:
+                counts = vectorizer.fit_transform(text).tocsr()
+                terms = vectorizer.get_feature_names_out().tolist()
+            except ValueError:
+                # Only stop words in this chunk
+                pass
+        save_npz(_spilled(_spill, chunk, "counts.npz"), counts)
+        np.save(_spilled(_spill, chunk, "hashes.npy"), hashes)
+        with open(_spilled(_spill, chunk, "terms.json"), 'w') as f:
+            json.dump(terms, f)
+    return table, rejected, identity_keys(frame)
+
+
+# Spilled counts and terms of each chunk, restricted to the rows where keep is set
+def _kept_counts(spill, sizes, keep):
+    bounds = np.cumsum([0, *sizes])
+    for chunk, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        kept = keep[start:end]
+        counts = load_npz(_spilled(spill, chunk, "counts.npz")).tocsr()[kept]
+        with open(_spilled(spill, chunk, "terms.json")) as f:
+            terms = json.load(f)
+        yield chunk, counts, terms, kept
+
+
+# TF-IDF index of the kept rows from the spilled chunks, over the sorted global vocabulary of the terms
+# in use. The first pass sums document frequencies, the second weighs each chunk into a preallocated
+# matrix, so no more than one chunk's counts are held next to it.
+def merge_tfidf(spill, sizes, keep):
+    frequency = Counter()
+    nnz = 0
+    for _, counts, terms, _ in _kept_counts(spill, sizes, keep):
+        used = np.unique(counts.indices)
+        chunk_frequency = np.bincount(counts.indices, minlength=len(terms))
+        frequency.update({terms[i]: int(chunk_frequency[i]) for i in used})
+        nnz += counts.nnz
+    vocabulary = sorted(frequency)
+    lookup = {term: i for i, term in enumerate(vocabulary)}
+    rows = int(keep.sum())
+    vectorizer = TfidfIndex.fitted_vectorizer(vocabulary, [frequency[term] for term in vocabulary], rows)
+
+    data = np.empty(nnz, dtype=TFIDF_OPTIONS['dtype'])
+    indices = np.empty(nnz, dtype=np.int32)
+    indptr = np.zeros(rows + 1, dtype=np.int64)
+    digest = hashlib.sha256()
+    row = 0
+    for chunk, counts, terms, kept in _kept_counts(spill, sizes, keep):
+        if not counts.shape[0]:
+            continue
+        digest.update(np.load(_spilled(spill, chunk, "hashes.npy"))[kept].tobytes())
+        remap = np.fromiter((lookup.get(term, 0) for term in terms), dtype=np.int32, count=len(terms))
+        matrix = csr_matrix((counts.data, remap[counts.indices], counts.indptr),
+                            shape=(counts.shape[0], len(vocabulary)))
+        matrix.sort_indices()
+        matrix = TfidfIndex.weigh(matrix, vectorizer)
+        start = indptr[row]
+        data[start:start + matrix.nnz] = matrix.data
+        indices[start:start + matrix.nnz] = matrix.indices
+        indptr[row + 1:row + 1 + matrix.shape[0]] = start + matrix.indptr[1:]
+        row += matrix.shape[0]
+    matrix = csr_matrix((data, indices, indptr), shape=(rows, len(vocabulary)))
+    return TfidfIndex(vectorizer, matrix, digest.hexdigest()[:16])
+
+
+# Copy of the row groups at source keeping the rows where keep is set, one row group at a time
+def filter_row_groups(source, path, keep):
+    parquet = pq.ParquetFile(source)
+    start = 0
+    with pq.ParquetWriter(path, parquet.schema_arrow) as writer:
+        for i in range(parquet.num_row_groups):
+            table = parquet.read_row_group(i)
+            selected = keep[start:start + table.num_rows]
+            start += table.num_rows
+            if selected.any():
+                writer.write_table(table.filter(pa.array(selected)))
+
+
+# Distinct tokens of each token column, read one batch at a time
+def vocabulary_sizes(path, columns):
+    seen = {column: set() for column in columns}
+    for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+        for column in columns:
+            seen[column].update(batch.column(column).flatten().unique().to_pylist())
+    return {column: len(values) for column, values in seen.items()}
+
+
+# Ingest a CSV file into the snapshot at path; returns {'rows', 'rejected', 'duplicates', 'aliases', 'tokens'},
+# aliases mapping the id of every collapsed duplicate to the id of the row kept for its movie
+def ingest_csv(source, path=SNAPSHOT_PATH, index_dir=INDEX_DIR, workers=None, block_size=BLOCK_BYTES):
+    names = csv_columns(source)
+    if 'genres' not in names:
+        raise ValueError("'genres' kolonu bulunamadı. Lütfen verinizi kontrol edin.")
+    schema = snapshot_schema(names)
+    workers = workers or os.cpu_count() or 1
+    rejected = Counter(malformed=0)
+
+    def malformed(row):
+        rejected['malformed'] += 1
+        return 'skip'
+
+    reader = pacsv.open_csv(
+        source, read_options=pacsv.ReadOptions(block_size=block_size),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True, invalid_row_handler=malformed),
+        convert_options=pacsv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                             strings_can_be_null=True))
+    sizes = []
+    identities = []
+    ids = []
+
+    def collect(result):
+        table, chunk_rejected, identity = result
+        rejected.update(chunk_rejected)
+        if table.num_rows:
+            writer.write_table(table)
+        identities.append(identity)
+        if 'id' in names:
+            ids.append(table.column('id').to_numpy())
+        sizes.append(table.num_rows)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    raw = path + ".raw.tmp"
+    spill = tempfile.mkdtemp(prefix=os.path.basename(path) + ".chunks.", dir=os.path.dirname(path) or '.')
+    try:
+        with timed('ingest', 'total'):
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(schema, spill)) as pool, \
+                    pq.ParquetWriter(raw, schema) as writer, reader:
+                pending = deque()
+                for chunk, batch in enumerate(reader):
+                    pending.append(pool.submit(_process, chunk, batch))
+                    if len(pending) > 2 * workers:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+
+            with timed('ingest', 'duplicates'):
+                identity = pd.concat(identities, ignore_index=True) if identities else pd.DataFrame()
+                representative = canonical_rows(identity) if len(identity) else np.zeros(0, np.int64)
+                keep = representative == np.arange(len(identity))
+                ids = np.concatenate(ids) if ids else np.zeros(0, np.int32)
+                # An id that a kept movie still uses is not an alias
+                collapsed = np.flatnonzero(~keep)[~np.isin(ids[~keep], ids[keep])] if len(ids) else []
+                aliases = dict(zip(ids[collapsed].tolist(), ids[representative[collapsed]].tolist()))
+            if keep.all():
+                os.replace(raw, path + ".tmp")
+            else:
+                filter_row_groups(raw, path + ".tmp", keep)
+                os.remove(raw)
+            if keep.any() and TFIDF_COLUMNS <= set(names):
+                with timed('ingest', 'tfidf'):
+                    merge_tfidf(spill, sizes, keep).save(index_dir)
+            tokens = vocabulary_sizes(path + ".tmp", [column for column in LIST_COLUMNS if column in names])
+            os.replace(path + ".tmp", path)
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+    for reason, value in rejected.items():
+        count('ingest_rejected', value, reason=reason)
+    count('ingest_duplicates', int((~keep).sum()))
+    return {'rows': int(keep.sum()), 'rejected': dict(rejected), 'duplicates': int((~keep).sum()),
+            'aliases': aliases, 'tokens': tokens}
@@ -0,0 +1,108 @@
+# Local poster thumbnail cache: TMDB images are fetched in a smaller size variant, kept on disk with
+# LRU eviction (file mtime = last use) under a size cap, and can be prefetched in the background.
+import hashlib
+import os
+import re
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import POSTER_DIR
+from .metrics import count, timed
+
+THUMBNAIL_SIZE = 'w300'
+
+
+# Same TMDB image in another size variant, e.g. .../t/p/w500/x.jpg -> .../t/p/w300/x.jpg
+def thumbnail_url(url, size=THUMBNAIL_SIZE):
+    return re.sub(r'/t/p/[^/]+/', f'/t/p/{size}/', url, count=1)
+
+
+class PosterCache:
+    def __init__(self, directory=POSTER_DIR, max_bytes=200 * 1024 * 1024, size=THUMBNAIL_SIZE, max_workers=4,
+                 timeout=10):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = size
+        self.timeout = timeout
+        os.makedirs(directory, exist_ok=True)
+        self._total = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith('.img'))
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='poster')
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.img')
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)
+        return data
+
+    def _download(self, url):
+        path = self.path(url)
+        if os.path.exists(path):
+            return self._read(path)
+        with timed('posters', 'download'):
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                data = response.read()
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data)
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+        return data
+
+    def _future(self, url):
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None:
+                future = self._pending[url] = self._executor.submit(self._download, url)
+                future.add_done_callback(lambda _: self._forget(url))
+        return future
+
+    def _forget(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    # Least recently used files go first until the cache is back under 90% of its cap
+    def evict(self):
+        entries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.img')),
+                         key=lambda entry: entry.stat().st_mtime)
+        with self._lock:
+            for entry in entries:
+                if self._total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                self._total -= size
+
+    # Image bytes of the thumbnail, or None when it cannot be fetched in time
+    def get(self, url):
+        url = thumbnail_url(url, self.size)
+        try:
+            data = self._read(self.path(url))
+            count('cache_hits', cache='posters')
+            return data
+        except OSError:
+            pass
+        count('cache_misses', cache='posters')
+        try:
+            return self._future(url).result(timeout=self.timeout)
+        except Exception:
+            return None
+
+    # Start fetching thumbnails in the background, e.g. for the next result page
+    def prefetch(self, urls):
+        for url in urls:
+            url = thumbnail_url(url, self.size)
+            if not os.path.exists(self.path(url)):
+                self._future(url)
@@ -0,0 +1,69 @@
+# Per-user taste profiles: a sparse {feature name: weight} vector over TasteIndex features
+# ('genre:drama', 'cast:...', ...) plus the recently viewed titles. Adding a view costs
+# O(tokens of that movie); older views fade out through exponential decay.
+import json
+import os
+import sqlite3
+import threading
+
+from .config import INDEX_DIR
+
+PROFILES_PATH = os.path.join(INDEX_DIR, "profiles.sqlite")
+
+
+class TasteProfile:
+    max_features = 256
+    max_seen = 100
+
+    def __init__(self, weights=None, scale=1.0, seen=(), decay=0.8):
+        self.weights = dict(weights or {})
+        # New views are added with a growing scale instead of shrinking every stored weight
+        self.scale = scale
+        self.seen = list(seen)
+        self.decay = decay
+
+    def add(self, title, features):
+        self.scale /= self.decay
+        for name, value in features.items():
+            self.weights[name] = self.weights.get(name, 0.0) + value * self.scale
+        if title in self.seen:
+            self.seen.remove(title)
+        self.seen = (self.seen + [title])[-self.max_seen:]
+        if self.scale > 1e6:
+            self.weights = {name: weight / self.scale for name, weight in self.weights.items()}
+            self.scale = 1.0
+        # Amortized pruning keeps the profile a few kilobytes whatever the history length
+        if len(self.weights) > 2 * self.max_features:
+            top = sorted(self.weights.items(), key=lambda item: item[1], reverse=True)[:self.max_features]
+            self.weights = dict(top)
+
+    def __bool__(self):
+        return bool(self.weights)
+
+    def to_dict(self):
+        return {'weights': self.weights, 'scale': self.scale, 'seen': self.seen}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('weights'), data.get('scale', 1.0), data.get('seen', ()))
+
+
+# SQLite store of profiles by user id, for API clients
+class ProfileStore:
+    def __init__(self, path=PROFILES_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS profiles (user TEXT PRIMARY KEY, profile TEXT)")
+
+    def get(self, user):
+        with self._lock:
+            row = self._db.execute("SELECT profile FROM profiles WHERE user = ?", (user,)).fetchone()
+        return TasteProfile.from_dict(json.loads(row[0])) if row else TasteProfile()
+
+    def put(self, user, profile):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?)", (user, json.dumps(profile.to_dict())))
@@ -0,0 +1,326 @@
+import numpy as np
+import pandas as pd
+
+from .indexes import (CastIndex, FuzzyMatcher, GenreIndex, SimilarityIndex, TasteIndex, TfidfIndex,
+                      WeightedRating, normalize_name, top_k_indices)
+from .ingest import poster_urls
+from .metrics import timed
+
+
+# Result rows with the given columns; poster URLs are built for these rows only unless the frame has them
+def select_rows(dataframe, rows, columns):
+    selected = dataframe.iloc[rows]
+    if 'poster_url' in columns and 'poster_url' not in selected.columns:
+        selected = selected.assign(poster_url=poster_urls(selected['backdrop_path']))
+    return selected[columns].reset_index(drop=True)
+
+
+# Simple recommender function
+def simple_recommender(df, percentile=0.95, weighted_rating=None):
+    if weighted_rating is None:
+        weighted_rating = WeightedRating(df)
+    with timed('simple', 'score'):
+        rows, _ = weighted_rating.top_k(np.ones(len(df), dtype=bool), 'all', percentile)
+    return select_rows(df, rows, ['title', 'averageRating', 'poster_url', 'overview'])
+
+
+# Genre-based recommender function
+def genre_based_recommender(df, genre, percentile=0.90, weighted_rating=None, genre_index=None):
+    genre = genre.lower()
+    if genre_index is None:
+        genre_index = GenreIndex(df)
+    # Get all unique genres
+    all_genres = genre_index.names
+    if not all_genres:
+        return "No genres available in the dataset."
+    # Find the closest matching genre
+    from rapidfuzz import fuzz, process
+    with timed('genre', 'match'):
+        closest_match = process.extractOne(genre, all_genres, scorer=fuzz.ratio)
+    if closest_match:
+        closest_match = closest_match[0]
+    else:
+        return f"No matching genres found for: {genre}"
+    if not len(genre_index.rows(closest_match)):
+        return f"No movies found for the genre: {closest_match}"
+    # Weighted-rating ordering of the genre, precomputed on first use
+    if weighted_rating is None:
+        weighted_rating = WeightedRating(df)
+    with timed('genre', 'score'):
+        rows, wr = genre_index.ranked(closest_match, percentile, weighted_rating)
+    if not len(rows):
+        return f"No qualified movies found for the genre: {closest_match}"
+
+    qualified = select_rows(df, rows[:10], ['title', 'numVotes', 'averageRating', 'poster_url', 'overview'])
+    qualified['numVotes'] = qualified['numVotes'].astype('int')
+    qualified['wr'] = wr[:10]
+    return qualified
+
+
+# Director-based recommender function
+def director_based_recommender(director, dataframe, percentile=0.90, weighted_rating=None, director_matcher=None):
+    if director_matcher is None:
+        director_matcher = FuzzyMatcher(dataframe['directors'].dropna().unique())
+    with timed('director', 'match'):
+        closest_matches = [name for name, _ in director_matcher.match(director, limit=10, score_cutoff=70)]
+    if not closest_matches:
+        return closest_matches, pd.DataFrame()
+
+    closest_match = closest_matches[0]
+    if weighted_rating is None:
+        weighted_rating = WeightedRating(dataframe)
+    with timed('director', 'filter'):
+        director_mask = (dataframe['directors'] == closest_match).to_numpy(dtype=bool)
+    with timed('director', 'score'):
+        rows, _ = weighted_rating.top_k(director_mask, ('director', closest_match), percentile)
+    return closest_matches, select_rows(dataframe, rows, ['title', 'original_title', 'original_language', 'averageRating', 'poster_url', 'overview'])
+
+
+# Cast-based recommender function
+def cast_based_recommender(df, cast_name, percentile=0.90, weighted_rating=None, cast_index=None, cast_matcher=None):
+    if cast_index is None:
+        cast_index = CastIndex(df)
+    with timed('cast', 'match'):
+        name_ids = cast_index.lookup(cast_name)
+        if not name_ids and cast_matcher is not None:
+            # Fall back to the closest spelling, e.g. "Sener Sen" -> "şener şen"
+            name_ids = [cast_index.positions[name] for name, _ in cast_matcher.match(cast_name, limit=1, score_cutoff=85)]
+    with timed('cast', 'filter'):
+        cast_rows = cast_index.rows(name_ids)
+    if not len(cast_rows):
+        return f"{cast_name} için film bulunamadı."
+    if weighted_rating is None:
+        weighted_rating = WeightedRating(df)
+    with timed('cast', 'score'):
+        rows, _ = weighted_rating.top_k(cast_rows, ('cast', normalize_name(cast_name)), percentile)
+    return select_rows(df, rows, ['title', 'original_title', 'original_language', 'numVotes', 'averageRating', 'popularity', 'poster_url', 'overview'])
+
+
+# Content-based recommender using Jaccard similarity
+def content_based_recommender(title, dataframe, top_n=10, similarity_index=None, title_matcher=None):
+    if 'title' not in dataframe.columns:
+        raise ValueError("'title' sütunu veri çerçevesinde bulunamadı.")
+    # Search for the title in both 'title' and 'original_title'
+    with timed('content', 'match'):
+        is_target = ((dataframe['title'] == title) | (dataframe['original_title'] == title)).to_numpy()
+        if not is_target.any() and title_matcher is not None:
+            closest_titles = title_matcher.match(title, limit=1, score_cutoff=85)
+            if closest_titles:
+                title = closest_titles[0][0]
+                is_target = ((dataframe['title'] == title) | (dataframe['original_title'] == title)).to_numpy()
+    target_rows = np.flatnonzero(is_target)
+    if not len(target_rows):
+        return pd.DataFrame(columns=['Film Adı', 'IMDB Rating', 'Poster URL', 'Overview'])
+
+    if similarity_index is None:
+        similarity_index = SimilarityIndex(dataframe)
+    with timed('content', 'score'):
+        scores = similarity_index.scores(target_rows[0])
+    with timed('content', 'sort'):
+        scores[is_target | dataframe['averageRating'].isna().to_numpy()] = -np.inf
+        top = top_k_indices(scores, top_n)
+    recommendations = dataframe.iloc[top[np.isfinite(scores[top])]]
+
+    if 'poster_url' in recommendations:
+        poster_url = recommendations['poster_url']
+    elif 'backdrop_path' in recommendations:
+        poster_url = poster_urls(recommendations['backdrop_path'])
+    else:
+        poster_url = pd.Series(None, index=recommendations.index)
+    overview = recommendations['overview'] if 'overview' in recommendations else pd.Series(None, index=recommendations.index)
+    show_original = (recommendations['original_language'] != 'en') & recommendations['original_title'].notna()
+    film_title = recommendations['title'].where(~show_original, recommendations['title'] + " / " + recommendations['original_title'])
+    return pd.DataFrame({
+        'Film Adı': film_title,
+        'IMDB Rating': recommendations['averageRating'],
+        'Poster URL': poster_url.fillna('Poster bulunamadı'),
+        'Overview': overview.fillna('Özet bulunamadı')}).reset_index(drop=True)
+
+
+# Keyword-based recommender function
+def keyword_based_recommender(keyword, dataframe, top_n=10, tfidf_index=None):
+    keyword = keyword.lower()
+    if tfidf_index is None:
+        tfidf_index = TfidfIndex.build(dataframe)
+    with timed('keyword', 'score'):
+        similarity_scores = tfidf_index.scores(keyword)
+    with timed('keyword', 'filter'):
+        matched = np.flatnonzero(similarity_scores > 0)
+        if len(matched) > top_n:
+            # Keep everything tied with the k-th best score so popularity/rating can break ties
+            kth = np.partition(similarity_scores[matched], len(matched) - top_n)[len(matched) - top_n]
+            matched = matched[similarity_scores[matched] >= kth]
+    with timed('keyword', 'sort'):
+        filtered_df = dataframe.iloc[matched][['popularity', 'averageRating']].assign(
+            similarity=similarity_scores[matched], row=matched)
+        filtered_df = filtered_df.sort_values(by=['similarity', 'popularity', 'averageRating'], ascending=[False, False, False])
+    return select_rows(dataframe, filtered_df['row'].to_numpy()[:top_n], ['title', 'averageRating', 'poster_url', 'overview', 'tagline'])
+
+
+# Semantic recommender: nearest overviews in the LSA space, so related wording also matches
+def semantic_recommender(query, dataframe, top_n=10, tfidf_index=None, semantic_index=None):
+    from .semantic import SemanticIndex
+    if tfidf_index is None:
+        tfidf_index = TfidfIndex.build(dataframe)
+    if semantic_index is None:
+        semantic_index = SemanticIndex.build(tfidf_index)
+    with timed('semantic', 'score'):
+        rows, scores = semantic_index.search(query.lower(), tfidf_index, top_n)
+    return select_rows(dataframe, rows[scores > 0], ['title', 'averageRating', 'poster_url', 'overview', 'tagline'])
+
+
+# Mood-based recommender function
+mood_to_genre = {
+    "happy": ["comedy", "family", "musical"],
+    "sad": ["drama", "romance", "biography"],
+    "adventurous": ["action", "adventure", "fantasy", "sci-fi"],
+    "scary": ["horror", "thriller", "mystery"],
+    "excited": ["action", "adventure", "sci-fi", "crime"],
+    "relaxed": ["comedy", "family", "romance", "animation"],
+    "curious": ["mystery", "documentary", "crime"],
+    "nostalgic": ["classic", "musical", "family", "romance"],
+    "inspired": ["biography", "history", "sport", "drama"],
+    "romantic": ["romance", "comedy", "drama"],
+    "thoughtful": ["drama", "mystery", "sci-fi"],
+    "funny": ["comedy", "animation", "family"],
+    "dark": ["thriller", "horror", "crime", "drama"],
+    "uplifting": ["family", "musical", "adventure", "comedy"],
+    "tense": ["thriller", "crime", "mystery", "horror"],
+    "magical": ["fantasy", "sci-fi", "animation", "adventure"]}
+
+mood_translation = {
+    "mutlu": "happy",
+    "üzgün": "sad",
+    "maceracı": "adventurous",
+    "korkutucu": "scary",
+    "heyecanlı": "excited",
+    "rahatlamış": "relaxed",
+    "meraklı": "curious",
+    "nostaljik": "nostalgic",
+    "ilham verici": "inspired",
+    "romantik": "romantic",
+    "düşünceli": "thoughtful",
+    "komik": "funny",
+    "karanlık": "dark",
+    "moral verici": "uplifting",
+    "gergin": "tense",
+    "büyülü": "magical"}
+
+def mood_based_recommender(mood, dataframe, top_n=10, genre_index=None):
+    genres = mood_to_genre.get(mood.lower(), [])
+    if not genres:
+        return f"No genres found for mood: {mood}"
+    if genre_index is None:
+        genre_index = GenreIndex(dataframe)
+    with timed('mood', 'score'):
+        rows = genre_index.most_popular(genres, top_n)
+    return select_rows(dataframe, rows, ['title', 'averageRating', 'poster_url', 'overview'])
+
+
+# Hybrid recommender: every given signal becomes a [0, 1] score vector from its index and the
+# vectors are summed with their weights in one pass, e.g. dark thrillers like Se7en by Fincher:
+#   hybrid_recommender(df, mood='dark', genres=['thriller'], director='David Fincher', title='Se7en')
+# A movie needs a non-zero score from at least one signal; the weighted rating (scaled to [0, 1]) only
+# breaks ties, so its weight stays below any step of a signal score.
+hybrid_weights = {'genre': 1.0, 'director': 1.0, 'cast': 1.0, 'title': 1.5, 'keywords': 1.5, 'rating': 1e-3}
+
+def hybrid_recommender(dataframe, mood=None, genres=(), director=None, cast=(), title=None, keywords=None,
+                       top_n=10, weights=None, percentile=0.90, weighted_rating=None, genre_index=None,
+                       director_matcher=None, cast_index=None, cast_matcher=None, similarity_index=None,
+                       title_matcher=None, tfidf_index=None):
+    weights = dict(hybrid_weights, **(weights or {}))
+    signals = {}
+    exclude = np.zeros(len(dataframe), dtype=bool)
+
+    with timed('hybrid', 'match'):
+        wanted = list(genres)
+        if mood:
+            wanted += mood_to_genre.get(mood_translation.get(mood.lower(), mood.lower()), [])
+        if wanted:
+            from rapidfuzz import fuzz, process
+            if genre_index is None:
+                genre_index = GenreIndex(dataframe)
+            resolved = {match[0] for match in (process.extractOne(genre.lower(), genre_index.names, scorer=fuzz.ratio,
+                                                                  score_cutoff=80) for genre in wanted) if match}
+            if resolved:
+                signals['genre'] = lambda: sum(genre_index.matches([genre]).astype(np.float32)
+                                               for genre in resolved) / len(resolved)
+        if director:
+            if director_matcher is None:
+                director_matcher = FuzzyMatcher(dataframe['directors'].dropna().unique())
+            matches = director_matcher.match(director, limit=1, score_cutoff=70)
+            if matches:
+                signals['director'] = lambda: (dataframe['directors'] == matches[0][0]).to_numpy(dtype=np.float32)
+        names = [name for name in ([cast] if isinstance(cast, str) else cast) if name]
+        if names:
+            if cast_index is None:
+                cast_index = CastIndex(dataframe)
+            name_rows = []
+            for name in names:
+                name_ids = cast_index.lookup(name)
+                if not name_ids and cast_matcher is not None:
+                    name_ids = [cast_index.positions[match] for match, _ in cast_matcher.match(name, limit=1, score_cutoff=85)]
+                if name_ids:
+                    name_rows.append(cast_index.rows(name_ids))
+            if name_rows:
+                signals['cast'] = lambda: np.bincount(np.concatenate(name_rows), minlength=len(dataframe)).astype(
+                    np.float32) / len(names)
+        if title:
+            is_target = ((dataframe['title'] == title) | (dataframe['original_title'] == title)).to_numpy()
+            if not is_target.any() and title_matcher is not None:
+                closest_titles = title_matcher.match(title, limit=1, score_cutoff=85)
+                if closest_titles:
+                    is_target = ((dataframe['title'] == closest_titles[0][0])
+                                 | (dataframe['original_title'] == closest_titles[0][0])).to_numpy()
+            if is_target.any():
+                if similarity_index is None:
+                    similarity_index = SimilarityIndex(dataframe)
+                exclude |= is_target
+                signals['title'] = lambda: similarity_index.scores(np.flatnonzero(is_target)[0])
+        if keywords:
+            if tfidf_index is None:
+                tfidf_index = TfidfIndex.build(dataframe)
+            signals['keywords'] = lambda: tfidf_index.scores(keywords.lower())
+    if not signals:
+        return "Verilen ölçütlerle eşleşen film bulunamadı."
+
+    with timed('hybrid', 'score'):
+        scores = np.zeros(len(dataframe), dtype=np.float64)
+        for name, signal in signals.items():
+            scores += weights.get(name, 1.0) * signal()
+        candidates = np.flatnonzero((scores > 0) & ~exclude)
+        if weighted_rating is None:
+            weighted_rating = WeightedRating(dataframe)
+        C, m = weighted_rating.stats(np.ones(len(dataframe), dtype=bool), 'all', percentile)
+        v = weighted_rating.num_votes[candidates]
+        R = weighted_rating.ratings[candidates]
+        wr = np.nan_to_num((v / (v + m) * R) + (m / (m + v) * C)) / 10
+        scores = scores[candidates] + weights.get('rating', 0.0) * wr
+    with timed('hybrid', 'sort'):
+        top = top_k_indices(scores, top_n)
+    if not len(top):
+        return "Verilen ölçütlerle eşleşen film bulunamadı."
+    recommendations = select_rows(dataframe, candidates[top], ['title', 'averageRating', 'poster_url', 'overview'])
+    recommendations['score'] = scores[top]
+    return recommendations
+
+
+# Personalized recommender: movies closest to a TasteProfile, leaving out the ones already viewed
+def personalized_recommender(dataframe, profile, top_n=10, taste_index=None):
+    if not profile:
+        return "Henüz bir tercih kaydedilmedi; önce birkaç film görüntüleyin."
+    if taste_index is None:
+        taste_index = TasteIndex(dataframe)
+    with timed('personal', 'score'):
+        scores = taste_index.scores(profile.weights)
+    with timed('personal', 'sort'):
+        seen = [taste_index.title_rows[title] for title in profile.seen if title in taste_index.title_rows]
+        scores[seen] = -np.inf
+        scores[dataframe['averageRating'].isna().to_numpy()] = -np.inf
+        top = top_k_indices(scores, top_n)
+        top = top[scores[top] > 0]
+    if not len(top):
+        return "Tercihlerinize uyan yeni film bulunamadı."
+    recommendations = select_rows(dataframe, top, ['title', 'averageRating', 'poster_url', 'overview'])
+    recommendations['score'] = scores[top]
+    return recommendations
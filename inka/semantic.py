@@ -0,0 +1,120 @@
+# Semantic overview search: LSA (TruncatedSVD) projection of the TF-IDF matrix, stored as a
+# memory-mapped float16 matrix and searched through an IVF (k-means inverted file) index.
+#
+#   python -m inka.semantic      # offline build for the local snapshot
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .config import INDEX_DIR
+from .indexes import _patched, top_k_indices
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class SemanticIndex:
+    def __init__(self, components, vectors, centroids, list_offsets, list_rows, version=None):
+        self.components = components
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.version = version
+
+    @classmethod
+    def build(cls, tfidf_index, dimensions=128, lists=None, seed=0):
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.decomposition import TruncatedSVD
+
+        matrix = tfidf_index.matrix
+        dimensions = max(1, min(dimensions, matrix.shape[1] - 1, matrix.shape[0] - 1))
+        svd = TruncatedSVD(dimensions, random_state=seed)
+        vectors = _normalize(svd.fit_transform(matrix).astype(np.float32))
+        lists = lists or max(1, min(len(vectors), int(4 * np.sqrt(len(vectors)))))
+        kmeans = MiniBatchKMeans(lists, random_state=seed, n_init=3, batch_size=4096).fit(vectors)
+        assignments = kmeans.labels_
+        list_rows = np.argsort(assignments, kind='stable').astype(np.int32)
+        list_offsets = np.searchsorted(assignments[list_rows], np.arange(lists + 1)).astype(np.int64)
+        return cls(svd.components_.astype(np.float32), vectors.astype(np.float16),
+                   _normalize(kmeans.cluster_centers_.astype(np.float32)), list_offsets, list_rows,
+                   tfidf_index.version)
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in ('components', 'vectors', 'centroids', 'list_offsets', 'list_rows'):
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp, "meta.json"), 'w') as f:
+            json.dump({'version': self.version}, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if name == 'vectors' else None)
+                  for name in ('components', 'vectors', 'centroids', 'list_offsets', 'list_rows')}
+        with open(os.path.join(path, "meta.json")) as f:
+            version = json.load(f)['version']
+        return cls(version=version, **arrays)
+
+    # Keyed by the TF-IDF corpus hash; the float16 vectors stay memory-mapped after loading
+    @classmethod
+    def load_or_build(cls, tfidf_index, directory=INDEX_DIR):
+        path = os.path.join(directory, f"semantic-{tfidf_index.version}")
+        if tfidf_index.version and os.path.exists(os.path.join(path, "meta.json")):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError):
+                pass
+        index = cls.build(tfidf_index)
+        if tfidf_index.version:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                for stale in glob.glob(os.path.join(directory, "semantic-*")):
+                    shutil.rmtree(stale, ignore_errors=True)
+                index.save(path)
+                return cls.load(path)
+            except OSError:
+                pass
+        return index
+
+    # Copy with the given rows projected into the fitted space and filed under their nearest list
+    def updated(self, tfidf_index, rows):
+        vectors = _normalize(np.asarray(tfidf_index.matrix[rows] @ self.components.T, dtype=np.float32))
+        size = tfidf_index.matrix.shape[0]
+        assignments = np.empty(len(self.vectors), dtype=np.int64)
+        assignments[self.list_rows] = np.repeat(np.arange(len(self.centroids)), np.diff(self.list_offsets))
+        assignments = _patched(assignments, size, rows, (vectors @ self.centroids.T).argmax(axis=1))
+        list_rows = np.argsort(assignments, kind='stable').astype(np.int32)
+        list_offsets = np.searchsorted(assignments[list_rows], np.arange(len(self.centroids) + 1)).astype(np.int64)
+        return SemanticIndex(self.components, _patched(self.vectors, size, rows, vectors.astype(np.float16)),
+                             self.centroids, list_offsets, list_rows, tfidf_index.version)
+
+    def embed(self, text, tfidf_index):
+        return _normalize((tfidf_index.vectorizer.transform([text]) @ self.components.T).ravel().astype(np.float32))
+
+    # Approximate top-k by cosine: score only the rows in the nprobe closest lists
+    def search(self, text, tfidf_index, top_k=10, nprobe=8):
+        query = self.embed(text, tfidf_index)
+        if not query.any():
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        probes = top_k_indices(self.centroids @ query, nprobe)
+        rows = np.sort(np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes]))
+        scores = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
+
+
+if __name__ == "__main__":
+    from .engine import InkaEngine
+    engine = InkaEngine.from_snapshot(refresh=False)
+    index = engine.semantic_index
+    print(f"{len(index.vectors)} film, {index.vectors.shape[1]} boyut, {len(index.centroids)} liste "
+          f"({index.version})")
@@ -0,0 +1,168 @@
+# Shared read-only catalog: the catalog and its indexes are built once into a versioned directory
+# that every worker process memory-maps, so RAM does not grow with the number of workers.
+#
+#   python -m inka.shared                   # publish the local snapshot
+#   INKA_SHARED_DIR=.inka_cache/shared streamlit run streamlit_app.py
+#
+# Layout:
+#   <root>/CURRENT                  name of the published version
+#   <root>/<version>/catalog.arrow  catalog as an uncompressed Arrow IPC file
+#   <root>/<version>/indexes.pkl    index objects; arrays above ARRAY_MIN_BYTES are stored
+#   <root>/<version>/arrays/*.npy   next to it and loaded with mmap_mode='r'
+#
+# Publishing writes the new version next to the old one and then swaps CURRENT, so workers attached
+# to the previous version keep reading it until they switch (InkaEngine.refresh).
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .config import INDEX_DIR, SHARED_DIR, SNAPSHOT_PATH
+from .ingest import TEXT_DTYPE
+from .metrics import timed
+
+# Indexes built at publish time; matchers and autocompletes are cheap and stay per process
+SHARED_INDEXES = ['weighted_rating', 'genre_index', 'cast_index', 'similarity_index', 'taste_index', 'tfidf_index',
+                  'semantic_index']
+ARRAY_MIN_BYTES = 1 << 16
+
+
+class _ArrayPickler(pickle.Pickler):
+    def __init__(self, file, directory):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.directory = directory
+        self.saved = 0
+
+    def persistent_id(self, obj):
+        if type(obj) in (np.ndarray, np.memmap) and obj.dtype != object and obj.nbytes >= ARRAY_MIN_BYTES:
+            name = f"{self.saved}.npy"
+            np.save(os.path.join(self.directory, name), obj)
+            self.saved += 1
+            return name
+        return None
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    def __init__(self, file, directory):
+        super().__init__(file)
+        self.directory = directory
+
+    def persistent_load(self, name):
+        return np.load(os.path.join(self.directory, name), mmap_mode='r')
+
+
+def _arrow_column(values):
+    # NaN stays a float value rather than a null so the column maps back without a copy
+    if values.dtype.kind in 'biuf':
+        return pa.array(values.to_numpy(), from_pandas=False)
+    return pa.array(values.array)
+
+
+def write_catalog(catalog, path):
+    # One record batch: takes on multi-chunk columns concatenate (copy) the whole column first
+    table = pa.table({column: _arrow_column(catalog[column]) for column in catalog.columns}).combine_chunks()
+    with pa.OSFile(path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+# Zero-copy for numeric, string and token columns; categoricals copy their int codes
+def read_catalog(path):
+    table = ipc.open_file(pa.memory_map(path)).read_all()
+
+    def types(arrow_type):
+        if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+            return TEXT_DTYPE
+        if pa.types.is_list(arrow_type):
+            return pd.ArrowDtype(arrow_type)
+        return None
+
+    return table.to_pandas(types_mapper=types, split_blocks=True, ignore_metadata=True)
+
+
+def current_version(root=SHARED_DIR):
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# Build the catalog's indexes and publish them, with the id aliases, as the current version; returns the version
+def publish(catalog, root=SHARED_DIR, index_dir=INDEX_DIR, indexes=SHARED_INDEXES, keep=2, aliases=None):
+    from .engine import CatalogState
+    return publish_state(CatalogState(catalog, index_dir, aliases), root, indexes, keep)
+
+
+# Publish a CatalogState as the current version; indexes it has already built are reused
+def publish_state(state, root=SHARED_DIR, indexes=SHARED_INDEXES, keep=2):
+    catalog = state.catalog
+    version = state.version
+    path = os.path.join(root, version)
+    if not os.path.exists(os.path.join(path, "indexes.pkl")):
+        with timed('shared', 'publish'):
+            tmp = os.path.join(root, f".{version}-{uuid.uuid4().hex}")
+            os.makedirs(os.path.join(tmp, "arrays"))
+            write_catalog(catalog, os.path.join(tmp, "catalog.arrow"))
+            built = {name: getattr(state, name) for name in indexes}
+            with open(os.path.join(tmp, "indexes.pkl"), 'wb') as f:
+                _ArrayPickler(f, os.path.join(tmp, "arrays")).dump(dict(built, version=version, aliases=state.aliases))
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+    with open(os.path.join(root, "CURRENT.tmp"), 'w') as f:
+        f.write(version)
+    os.replace(os.path.join(root, "CURRENT.tmp"), os.path.join(root, "CURRENT"))
+    prune(root, keep)
+    return version
+
+
+# Drop all but the newest `keep` versions; processes still attached keep their open mappings
+def prune(root=SHARED_DIR, keep=2):
+    current = current_version(root)
+    versions = sorted((entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.startswith('.')),
+                      key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[keep:]:
+        if entry.name != current:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# CatalogState over a published version (default: CURRENT), with its indexes already in place
+def attach(root=SHARED_DIR, version=None, index_dir=INDEX_DIR):
+    from .engine import CatalogState
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No shared catalog published under {root}")
+    path = os.path.join(root, version)
+    with timed('shared', 'attach'):
+        state = CatalogState(read_catalog(os.path.join(path, "catalog.arrow")), index_dir)
+        with open(os.path.join(path, "indexes.pkl"), 'rb') as f:
+            indexes = _ArrayUnpickler(f, os.path.join(path, "arrays")).load()
+        state.aliases = indexes.pop('aliases', {})
+        state._indexes.update(indexes)
+    return state
+
+
+def main(argv=None):
+    from .ingest import read_aliases, read_snapshot, snapshot_meta_path
+    parser = argparse.ArgumentParser(description="I.N.K.A. shared catalog")
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    parser.add_argument('--root', default=SHARED_DIR)
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    parser.add_argument('--keep', type=int, default=2, help="published versions to keep")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.root, exist_ok=True)
+    version = publish(read_snapshot(args.snapshot), args.root, args.index_dir, keep=args.keep,
+                      aliases=read_aliases(snapshot_meta_path(args.snapshot)))
+    print(f"{version} sürümü {args.root} altında yayınlandı")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
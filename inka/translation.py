@@ -0,0 +1,135 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+
+from .config import INDEX_DIR
+from .metrics import count, timed
+
+CACHE_PATH = os.path.join(INDEX_DIR, "translations.sqlite")
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+# Default backend: Google Translate, one googletrans client per thread
+class GoogleBackend:
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, text, dest):
+        if not hasattr(self._local, 'translator'):
+            from googletrans import Translator
+            self._local.translator = Translator()
+        return self._local.translator.translate(text, dest=dest).text
+
+
+# SQLite store keyed by (text hash, target language) with LRU eviction on last use
+class TranslationCache:
+    def __init__(self, path=CACHE_PATH, max_entries=200_000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS translations ("
+                             "key TEXT, dest TEXT, text TEXT, last_used REAL, PRIMARY KEY (key, dest))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+
+    def get_many(self, keys, dest):
+        keys = list(keys)
+        found = {}
+        with self._lock, self._db:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._db.execute(f"SELECT key, text FROM translations WHERE dest = ? AND key IN ({placeholders})",
+                                        [dest, *chunk]).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE translations SET last_used = ? WHERE key = ? AND dest = ?",
+                                     [(now, key, dest) for key in found])
+        return found
+
+    def put_many(self, items, dest):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                                 [(key, dest, text, now) for key, text in items.items()])
+            excess = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute("DELETE FROM translations WHERE rowid IN "
+                                 "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (excess,))
+
+
+# Cache-first translation; misses go to the backend concurrently
+class TranslationService:
+    def __init__(self, backend=None, cache=None, max_workers=8, timeout=10):
+        self.backend = backend or GoogleBackend()
+        self.cache = cache or TranslationCache()
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translate')
+
+    def _translate_and_store(self, key, text, dest):
+        with timed('translation', 'backend'):
+            translated = self.backend(text, dest)
+        self.cache.put_many({key: translated}, dest)
+        return translated
+
+    # Raises the backend error when the text is not cached and cannot be translated; returns the text
+    # itself when the backend does not answer within the timeout
+    def translate(self, text, dest='tr'):
+        key = text_key(text)
+        with timed('translation', 'cache'):
+            cached = self.cache.get_many([key], dest)
+        count('cache_hits' if key in cached else 'cache_misses', cache='translation')
+        if key in cached:
+            return cached[key]
+        future = self._executor.submit(self._translate_and_store, key, text, dest)
+        try:
+            with timed('translation', 'wait'):
+                return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # The translation keeps running and is cached when it completes
+            return text
+
+    # Translate every uncached text in parallel; returns {text: translation} for the ones available
+    def translate_many(self, texts, dest='tr'):
+        texts = {text_key(text): text for text in texts if text}
+        with timed('translation', 'cache'):
+            translations = self.cache.get_many(texts, dest)
+        futures = {self._executor.submit(self._translate_and_store, key, text, dest): key
+                   for key, text in texts.items() if key not in translations}
+        count('cache_hits', len(translations), cache='translation')
+        count('cache_misses', len(futures), cache='translation')
+        if futures:
+            # Unfinished translations keep running and are cached when they complete
+            with timed('translation', 'wait'):
+                done, _ = wait(futures, timeout=self.timeout)
+            for future in done:
+                if future.exception() is None:
+                    translations[futures[future]] = future.result()
+        return {text: translations[key] for key, text in texts.items() if key in translations}
+
+
+# Offline job: fill the cache for every overview in the local snapshot
+def pretranslate(dest='tr', batch_size=200, service=None):
+    from .ingest import load_snapshot
+    service = service or TranslationService(timeout=None)
+    overviews = load_snapshot(refresh=False)['overview'].dropna().unique()
+    translated = 0
+    for start in range(0, len(overviews), batch_size):
+        translated += len(service.translate_many(overviews[start:start + batch_size], dest))
+        print(f"{min(start + batch_size, len(overviews))}/{len(overviews)} özet işlendi, {translated} çeviri hazır")
+    return translated
+
+
+if __name__ == "__main__":
+    pretranslate(dest=sys.argv[1] if len(sys.argv) > 1 else 'tr')
@@ -1,284 +1,101 @@
+import os
+import time
+
+_imports_started = time.perf_counter()
+
 import pandas as pd
 import streamlit as st
-from rapidfuzz import fuzz, process  
-import difflib
-from googletrans import Translator
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# GitHub URL of dataset
-DATA_URL = "https://raw.githubusercontent.com/donayy/inka/refs/heads/main/movies_dataset.csv"
-POSTER_BASE_URL = "https://image.tmdb.org/t/p/w500"  
-
-
-@st.cache_data
-def load_data():
-    df = pd.read_csv(DATA_URL, on_bad_lines="skip")
-    # Normalize the genres, keywords and overview column
-    if 'genres' in df.columns:
-        df['genres'] = df['genres'].fillna('').apply(lambda x: x.split(',') if isinstance(x, str) else [])
-    else:
-        st.error("'genres' kolonu bulunamadı. Lütfen verinizi kontrol edin.")
-        return pd.DataFrame() 
-    
-    df['keywords'] = df['keywords'].fillna('').apply(lambda x: x.split(',') if isinstance(x, str) else [])
-    df['overview'] = df['overview'].fillna('').astype(str)
-    
-    # Generate Poster URL
-    if 'backdrop_path' in df.columns:
-        df['poster_url'] = df['backdrop_path'].apply(lambda x: f"{POSTER_BASE_URL}{x}" if pd.notnull(x) else None)
-    
-    return df
 
-# Translator for summaries
-translator = Translator()
-def translate_text(text, dest_language='tr'):
-    try:
-        return translator.translate(text, dest=dest_language).text
-    except Exception as e:
-        return f"Çeviri başarısız: {e}"
+from inka import InkaEngine
+from inka.metrics import metrics, profile
+from inka.posters import PosterCache, thumbnail_url
+from inka.profiles import TasteProfile
+from inka.recommenders import mood_translation
+from inka.translation import TranslationService
 
+# Heavy modules (scikit-learn, rapidfuzz, googletrans) are imported by the code that first needs them
+metrics.startup('imports', since=_imports_started)
 
-# Simple recommender function
-def simple_recommender(df, percentile=0.95):
-    num_votes = df[df['numVotes'].notnull()]['numVotes'].astype('int')
-    vote_averages = df[df['averageRating'].notnull()]['averageRating'].astype('float')
-    C = vote_averages.mean()
-    m = num_votes.quantile(percentile)
-    df['year'] = pd.to_datetime(df['release_date'], errors='coerce').dt.year
-    qualified = df[(df['numVotes'] >= m) & (df['averageRating'].notnull())][
-        ['title', 'year', 'numVotes', 'averageRating', 'poster_url', 'overview']]
-    qualified['wr'] = qualified.apply(
-        lambda x: (x['numVotes'] / (x['numVotes'] + m) * x['averageRating']) + 
-                  (m / (m + x['numVotes']) * C), axis=1)
-    qualified = qualified.sort_values('wr', ascending=False)
-    return qualified.head(10)[['title', 'averageRating', 'poster_url', 'overview']].reset_index(drop=True)
-
-
-
-# Genre-based recommender function
-def genre_based_recommender(df, genre, percentile=0.90):
-    genre = genre.lower()
-    # Normalize the genres column
-    df['genres'] = df['genres'].apply(lambda x: x if isinstance(x, list) else str(x).split(','))
-    # Get all unique genres
-    all_genres = df['genres'].explode().unique()
-    if not all_genres.size:
-        return "No genres available in the dataset."
-    # Find the closest matching genre
-    closest_match = process.extractOne(genre, all_genres, scorer=fuzz.ratio)
-    if closest_match:
-        closest_match = closest_match[0]
-    else:
-        return f"No matching genres found for: {genre}"
-    # Filter movies by the matched genre
-    df_filtered = df[df['genres'].apply(lambda x: closest_match in x)]
-    if df_filtered.empty:
-        return f"No movies found for the genre: {closest_match}"
-    # Calculate weighted rating
-    num_votes = df_filtered[df_filtered['numVotes'].notnull()]['numVotes'].astype('int')
-    vote_averages = df_filtered[df_filtered['averageRating'].notnull()]['averageRating'].astype('float')
-    C = vote_averages.mean()
-    m = num_votes.quantile(percentile)
-
-    qualified = df_filtered[(df_filtered['numVotes'] >= m) &
-                            (df_filtered['numVotes'].notnull()) &
-                            (df_filtered['averageRating'].notnull())][
-        ['title', 'numVotes', 'averageRating', 'poster_url', 'overview']]
-    
-    if qualified.empty:
-        return f"No qualified movies found for the genre: {closest_match}"
 
-    qualified['numVotes'] = qualified['numVotes'].astype('int')
-    qualified['averageRating'] = qualified['averageRating'].astype('float')
-    qualified['wr'] = qualified.apply(
-        lambda x: (x['numVotes'] / (x['numVotes'] + m) * x['averageRating']) +
-                  (m / (m + x['numVotes']) * C), axis=1)
+# One engine (catalog + indexes) per process, shared by every session. With INKA_SHARED_DIR the
+# catalog published by inka.shared is memory-mapped instead, so server processes share one copy.
+# The catalog and indexes load in a background thread; a page only waits for what it uses.
+@st.cache_resource
+def load_engine():
+    shared_dir = os.environ.get('INKA_SHARED_DIR')
+    if shared_dir:
+        return InkaEngine.from_shared(shared_dir, background=True)
+    return InkaEngine.from_snapshot(background=True)
 
-    # Sort by weighted rating and drop duplicates
-    qualified = qualified.drop_duplicates(subset='title')
-    qualified = qualified.sort_values('wr', ascending=False)
+# Translator for summaries, backed by a persistent cache shared by all sessions
+@st.cache_resource
+def load_translation_service():
+    return TranslationService()
 
-    return qualified.head(10).reset_index(drop=True)
+def translate_text(text, dest_language='tr'):
+    try:
+        return load_translation_service().translate(text, dest=dest_language)
+    except Exception as e:
+        return f"Çeviri başarısız: {e}"
+
+# Poster thumbnails on disk, shared by all sessions
+@st.cache_resource
+def load_poster_cache():
+    return PosterCache()
+
+# Autocomplete hints under a text input
+def show_suggestions(suggestions):
+    if suggestions:
+        st.caption("Öneriler: " + ", ".join(suggestions))
+
+# Taste profile of this session; opening a result's overview counts as viewing it
+def taste_profile():
+    if 'taste' not in st.session_state:
+        st.session_state['taste'] = TasteProfile()
+    return st.session_state['taste']
+
+def record_view(toggle_key, title):
+    if st.session_state.get(toggle_key):
+        load_engine().record_view(taste_profile(), title)
+
+RESULTS_PER_PAGE = 5
+
+# One page of results at a time. Posters of this page and the next are fetched in the background and
+# each row is drawn as its poster arrives; an overview is translated only once its toggle is opened.
+def show_results(recommendations, key):
+    pages = max(1, -(-len(recommendations) // RESULTS_PER_PAGE))
+    page_key = f"sayfa:{key}"
+    page_number = min(st.session_state.get(page_key, 0), pages - 1)
+    start = page_number * RESULTS_PER_PAGE
+    posters = load_poster_cache()
+    if 'poster_url' in recommendations:
+        posters.prefetch([url for url in recommendations['poster_url'].iloc[start:start + 2 * RESULTS_PER_PAGE]
+                          if isinstance(url, str) and url])
+    for i, row in recommendations.iloc[start:start + RESULTS_PER_PAGE].iterrows():
+        title_display = row['title']
+        if 'original_title' in row and row['original_language'] != 'en' and pd.notna(row['original_title']):
+            title_display = f"{row['title']} / {row['original_title']}"
+        st.write(f"**{title_display}** (IMDB Rating: {row['averageRating']:.1f})")
+        poster_url = row.get('poster_url')
+        if isinstance(poster_url, str) and poster_url:
+            st.image(posters.get(poster_url) or thumbnail_url(poster_url), width=300)
+        else:
+            st.write(" ")
+        overview = row.get('overview')
+        if isinstance(overview, str) and overview:
+            toggle_key = f"özet:{key}:{i}"
+            if st.toggle("Özet", key=toggle_key, on_change=record_view, args=(toggle_key, title_display)):
+                st.write(f"**Özet:** {translate_text(overview, dest_language='tr')}")
+        else:
+            st.write("Özet bulunamadı.")
+    if pages > 1:
+        previous, position, following = st.columns([1, 2, 1])
+        previous.button("◀ Önceki", key=f"{page_key}:önceki", disabled=page_number == 0,
+                        on_click=lambda: st.session_state.update({page_key: page_number - 1}))
+        position.write(f"Sayfa {page_number + 1} / {pages}")
+        following.button("Sonraki ▶", key=f"{page_key}:sonraki", disabled=page_number == pages - 1,
+                         on_click=lambda: st.session_state.update({page_key: page_number + 1}))
 
-    
-def get_genre_suggestions(partial_input, all_genres):
-    partial_input = partial_input.lower()
-    suggestions = [genre for genre in all_genres if partial_input in genre]
-    return suggestions
-
-# Director-based recommender function
-def director_based_recommender(director, dataframe, percentile=0.90):
-    director_choices = dataframe['directors'].dropna().unique()
-    closest_matches = difflib.get_close_matches(director, director_choices, n=10, cutoff=0.7)
-    if closest_matches:
-        closest_match = closest_matches[0]  
-        recommendations = dataframe[dataframe['directors'] == closest_match] 
-    else:
-        closest_match = None
-        recommendations = pd.DataFrame()  
-
-    closest_match = closest_matches[0]
-    df = dataframe[dataframe['directors'] == closest_match]
-    numVotess = df[df['numVotes'].notnull()]['numVotes'].astype('int')
-    vote_averages = df[df['averageRating'].notnull()]['averageRating'].astype('int')
-    C = vote_averages.mean()
-    m = numVotess.quantile(percentile)
-    qualified = df[(df['numVotes'] >= m) & (df['numVotes'].notnull()) & 
-                   (df['averageRating'].notnull())][['title', 'original_title', 'original_language', 'numVotes', 'averageRating', 'popularity', 'poster_url', 'overview']]
-    qualified['numVotes'] = qualified['numVotes'].astype('int')
-    qualified['averageRating'] = qualified['averageRating'].astype('int')
-    qualified['wr'] = qualified.apply(
-        lambda x: (x['numVotes'] / (x['numVotes'] + m) * x['averageRating']) + (m / (m + x['numVotes']) * C),
-        axis=1)
-    qualified = qualified.drop_duplicates(subset='title')
-    return closest_matches, qualified.sort_values('wr', ascending=False).head(10)[['title', 'original_title', 'original_language', 'averageRating', 'poster_url', 'overview']].reset_index(drop=True)
-
-
-def get_director_suggestions(partial_input, all_directors):
-    partial_input = partial_input.lower()
-    suggestions = [director for director in all_directors if partial_input in director]
-    return suggestions 
-
-# Cast-based recommender function
-def preprocess_cast_column(df):
-    cast_columns = df['cast'].str.split(',', expand=True)
-    df = pd.concat([df, cast_columns], axis=1)
-    return df
-
-def cast_based_recommender(df, cast_name, percentile=0.90):
-    df = preprocess_cast_column(df)
-    cast_columns = df.columns[5:]
-    df_cast = df[df[cast_columns].apply(lambda x: x.str.contains(cast_name, na=False).any(), axis=1)]
-    if df_cast.empty:
-        return f"{cast_name} için film bulunamadı."
-    numVotess = df_cast[df_cast['numVotes'].notnull()]['numVotes'].astype('int')
-    vote_averages = df_cast[df_cast['averageRating'].notnull()]['averageRating'].astype('int')
-    C = vote_averages.mean()
-    m = numVotess.quantile(percentile)
-    qualified = df_cast[(df_cast['numVotes'] >= m) &
-                        (df_cast['numVotes'].notnull()) &
-                        (df_cast['averageRating'].notnull())][
-        ['title', 'original_title', 'original_language', 'numVotes', 'averageRating', 'popularity', 'poster_url', 'overview']]
-    qualified['wr'] = qualified.apply(
-        lambda x: (x['numVotes'] / (x['numVotes'] + m) * x['averageRating']) + (
-                    m / (m + x['numVotes']) * C),
-        axis=1)
-    qualified = qualified.drop_duplicates(subset='title')
-    return qualified.sort_values('wr', ascending=False).head(10)[['title', 'original_title', 'original_language', 'numVotes', 'averageRating', 'popularity', 'poster_url', 'overview']].reset_index(drop=True)
-
-# Content-based recommender using Jaccard similarity
-def jaccard_similarity(set1, set2):
-    intersection = len(set1.intersection(set2))
-    union = len(set1.union(set2))
-    return intersection / union if union != 0 else 0
-
-def content_based_recommender(title, dataframe, top_n=10):
-    if 'title' not in dataframe.columns:
-        raise ValueError("'title' sütunu veri çerçevesinde bulunamadı.")
-    # Search for the title in both 'title' and 'original_title'
-    target_movie = dataframe[(dataframe['title'] == title) | (dataframe['original_title'] == title)]
-    if target_movie.empty:
-        return pd.DataFrame(columns=['Film Adı', 'IMDB Rating', 'Poster URL', 'Overview'])
-
-    target_movie = target_movie.iloc[0]
-    target_genres = set(target_movie['genres']) if isinstance(target_movie['genres'], list) else set(str(target_movie['genres']).split(','))
-    target_keywords = set(target_movie['keywords']) if isinstance(target_movie['keywords'], list) else set(str(target_movie['keywords']).split(','))
-
-    recommendations = []
-    for _, row in dataframe.iterrows():
-        if row['title'] != title and row.get('original_title') != title:
-            genres = set(row['genres']) if isinstance(row['genres'], list) else set(str(row['genres']).split(','))
-            keywords = set(row['keywords']) if isinstance(row['keywords'], list) else set(str(row['keywords']).split(','))
-
-            genre_score = jaccard_similarity(target_genres, genres)
-            keyword_score = jaccard_similarity(target_keywords, keywords)
-            total_score = genre_score * 0.5 + keyword_score * 0.5
-            if pd.isna(row['averageRating']):
-                continue
-            poster_url = row['poster_url'] if 'poster_url' in row and pd.notna(row['poster_url']) else 'Poster bulunamadı'
-            overview = row['overview'] if 'overview' in row and pd.notna(row['overview']) else 'Özet bulunamadı'
-
-            if row.get('original_language') != 'en' and pd.notna(row.get('original_title')):
-                film_title = f"{row['title']} / {row['original_title']}"
-            else:
-                film_title = row['title']
-            recommendations.append({
-                'Film Adı': film_title,
-                'IMDB Rating': row['averageRating'],
-                'Poster URL': poster_url,
-                'Overview': overview,
-                'Total Score': total_score})
-
-    sorted_recommendations = sorted(recommendations, key=lambda x: x['Total Score'], reverse=True)[:top_n]
-    return pd.DataFrame(sorted_recommendations).drop(columns=['Total Score']).reset_index(drop=True)
-
-
-# Keyword-based recommender function
-def keyword_based_recommender(keyword, dataframe, top_n=10):
-    keyword = keyword.lower()
-    dataframe['overview'] = dataframe['overview'].astype(str)
-    dataframe['keywords'] = dataframe['keywords'].astype(str)
-    dataframe['tagline'] = dataframe['tagline'].astype(str)
-    dataframe['combined_text'] = dataframe['overview'] + " " + dataframe['keywords'] + " " + dataframe['tagline']
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(dataframe['combined_text'])
-    keyword_vector = vectorizer.transform([keyword])
-    similarity_scores = cosine_similarity(keyword_vector, tfidf_matrix).flatten()
-    dataframe['similarity'] = similarity_scores
-    filtered_df = dataframe[dataframe['similarity'] > 0]
-    filtered_df = filtered_df.sort_values(by=['similarity', 'popularity', 'averageRating'], ascending=[False, False, False])
-    return filtered_df.head(top_n)[['title', 'averageRating', 'poster_url', 'overview', 'tagline']].reset_index(drop=True)
-
-
-
-# Mood-based recommender function
-mood_to_genre = {
-    "happy": ["comedy", "family", "musical"],
-    "sad": ["drama", "romance", "biography"],
-    "adventurous": ["action", "adventure", "fantasy", "sci-fi"],
-    "scary": ["horror", "thriller", "mystery"],
-    "excited": ["action", "adventure", "sci-fi", "crime"],
-    "relaxed": ["comedy", "family", "romance", "animation"],
-    "curious": ["mystery", "documentary", "crime"],
-    "nostalgic": ["classic", "musical", "family", "romance"],
-    "inspired": ["biography", "history", "sport", "drama"],
-    "romantic": ["romance", "comedy", "drama"],
-    "thoughtful": ["drama", "mystery", "sci-fi"],
-    "funny": ["comedy", "animation", "family"],
-    "dark": ["thriller", "horror", "crime", "drama"],
-    "uplifting": ["family", "musical", "adventure", "comedy"],
-    "tense": ["thriller", "crime", "mystery", "horror"],
-    "magical": ["fantasy", "sci-fi", "animation", "adventure"]}
-
-mood_translation = {
-    "mutlu": "happy",
-    "üzgün": "sad",
-    "maceracı": "adventurous",
-    "korkutucu": "scary",
-    "heyecanlı": "excited",
-    "rahatlamış": "relaxed",
-    "meraklı": "curious",
-    "nostaljik": "nostalgic",
-    "ilham verici": "inspired",
-    "romantik": "romantic",
-    "düşünceli": "thoughtful",
-    "komik": "funny",
-    "karanlık": "dark",
-    "moral verici": "uplifting",
-    "gergin": "tense",
-    "büyülü": "magical"}
-
-def mood_based_recommender(mood, dataframe, top_n=10):
-    genres = mood_to_genre.get(mood.lower(), [])
-    if not genres:
-        return f"No genres found for mood: {mood}"
-    dataframe['genres'] = dataframe['genres'].apply(lambda x: x if isinstance(x, list) else str(x).split(','))
-    filtered_df = dataframe[dataframe['genres'].apply(lambda x: any(g.strip().lower() in genres for g in x))]
-    filtered_df = filtered_df.sort_values(by='popularity', ascending=False)
-    return filtered_df.head(top_n)[['title', 'averageRating', 'poster_url', 'overview']].reset_index(drop=True)
-
-   
 
 # Streamlit App
 
@@ -427,57 +244,42 @@ st.markdown(
 )
 
 try:
-    df = load_data()
+    engine = load_engine()
 
     st.sidebar.title("Film Öneri Seçenekleri")
+    readiness = engine.readiness()
+    if not all(readiness.values()):
+        st.sidebar.caption("Katalog hazırlanıyor..." if not readiness['catalog'] else
+                           f"Dizinler hazırlanıyor ({sum(readiness.values())}/{len(readiness)})")
     page = st.sidebar.radio(
     "Hangi türde öneri istiyorsunuz?", 
     options=["Tüm Zamanların En İyi Filmleri", "Türe Göre Öneriler", "Yönetmen Seçimine Göre",
              "Oyuncu Seçimine Göre", "Girdiğiniz Filme Göre Öneriler", "Anahtar Kelimelere Göre",
-             "Ruh Haline Göre Öneriler", "Hakkımızda"])
+             "Ruh Haline Göre Öneriler", "Karma Öneri", "Sana Özel", "Hakkımızda", "Yönetici"])
 
 
     if page == "Tüm Zamanların En İyi Filmleri":
+        # Kept in the session so paging does not hide the list again
         if st.button("Tüm Zamanların En İyi Filmlerini Listele"):
-            recommendations_simple = simple_recommender(df)
-            for _, row in recommendations_simple.iterrows():
-                st.write(f"**{row['title']}** (IMDB Rating: {row['averageRating']:.1f})")
-                if row['poster_url']:
-                    st.image(row['poster_url'], width=500)
-                else:
-                    st.write(" ")
-                if row['overview']:
-                    translated_overview = translate_text(row['overview'], dest_language='tr')
-                    st.write(f"**Özet:** {translated_overview}")
-                else:
-                    st.write("Özet bulunamadı.")
+            st.session_state['simple_listed'] = True
+        if st.session_state.get('simple_listed'):
+            recommendations_simple = engine.simple()
+            show_results(recommendations_simple, 'simple')
 
     elif page == "Türe Göre Öneriler":
-        df['genres'] = df['genres'].apply(lambda x: x if isinstance(x, list) else str(x).split(','))
-        all_genres = sorted(set(genre.strip().lower() for genres in df['genres'] for genre in genres))
         genre_input = st.text_input("Bir tür girin (örneğin, Action, Science Fiction, Adventure):")
         
         if genre_input:
-            suggestions = get_genre_suggestions(genre_input, all_genres)
+            suggestions = engine.suggest('genre', genre_input)
             if suggestions:
                 st.write("Türler:")
                 for suggestion in suggestions[:5]:  
                     st.write(f"- {suggestion.capitalize()}")
                 closest_match = suggestions[0]
-                recommendations = genre_based_recommender(df, closest_match)
+                recommendations = engine.genre(closest_match)
                 if isinstance(recommendations, pd.DataFrame):
                     st.write(f"'{closest_match.capitalize()}' türündeki öneriler:")
-                    for _, row in recommendations.iterrows():
-                        st.write(f"**{row['title']}** (IMDB Rating: {row['averageRating']:.1f})")
-                        if row['poster_url']:
-                            st.image(row['poster_url'], width=500)
-                        else:
-                            st.write(" ")
-                        if row['overview']:
-                            translated_overview = translate_text(row['overview'], dest_language='tr')
-                            st.write(f"**Özet:** {translated_overview}")
-                        else:
-                            st.write("Özet bulunamadı.")
+                    show_results(recommendations, f"genre:{closest_match}")
                 else:
                     st.write(recommendations)
             else:
@@ -489,7 +291,8 @@ try:
     elif page == "Yönetmen Seçimine Göre":
         director_input = st.text_input("Bir yönetmen ismi girin (örneğin, Christopher Nolan, Quentin Tarantino, Nuri Bilge Ceylan, Ferzan Özpetek):")
         if director_input:
-            closest_matches, recommendations = director_based_recommender(director_input, df)
+            show_suggestions(engine.suggest('director', director_input, limit=5))
+            closest_matches, recommendations = engine.director(director_input)
             if closest_matches:
                 st.write(f"'{director_input}' ile en yakın eşleşen yönetmenler:")
                 for match in closest_matches:
@@ -497,22 +300,7 @@ try:
         
             if isinstance(recommendations, pd.DataFrame) and not recommendations.empty:
                 st.write(f"'{closest_matches[0]}' yönetmeninden öneriler:")
-                for _, row in recommendations.iterrows():
-                    if row['original_language'] != 'en' and pd.notna(row['original_title']):
-                        title_display = f"{row['title']} / {row['original_title']}"
-                    else:
-                        title_display = row['title']
-                
-                    st.write(f"**{title_display}** (IMDB Rating: {row['averageRating']:.1f})")
-                    if row['poster_url']:
-                        st.image(row['poster_url'], width=500)
-                    else:
-                        st.write(" ")
-                    if row['overview']:
-                        translated_overview = translate_text(row['overview'], dest_language='tr')
-                        st.write(f"**Özet:** {translated_overview}")
-                    else:
-                        st.write("Özet bulunamadı.")
+                show_results(recommendations, f"director:{closest_matches[0]}")
             else:
                 st.write("Hiçbir öneri bulunamadı.")
 
@@ -520,24 +308,11 @@ try:
     elif page == "Oyuncu Seçimine Göre":
         cast_name = st.text_input("Bir oyuncu ismi girin (örneğin, Christian Bale, Elijah Wood, Şener Şen):")
         if cast_name:
-            recommendations = cast_based_recommender(df, cast_name)
+            show_suggestions(engine.suggest('cast', cast_name, limit=5))
+            recommendations = engine.cast(cast_name)
             if isinstance(recommendations, pd.DataFrame) and not recommendations.empty:
                 st.write(f"'{cast_name}' oyuncusunun yer aldığı filmler:")
-                for _, row in recommendations.iterrows():
-                    if row['original_language'] != 'en' and pd.notna(row['original_title']):
-                        title_display = f"{row['title']} / {row['original_title']}"
-                    else:
-                        title_display = row['title']
-                    st.write(f"**{title_display}** (IMDB Rating: {row['averageRating']:.1f})")
-                    if row['poster_url']:
-                        st.image(row['poster_url'], width=500)
-                    else:
-                        st.write(" ")
-                    if row['overview']:
-                        translated_overview = translate_text(row['overview'], dest_language='tr')
-                        st.write(f"**Özet:** {translated_overview}")
-                    else:
-                        st.write("Özet bulunamadı.")
+                show_results(recommendations, f"cast:{cast_name}")
             else:
                 st.write("Hiçbir öneri bulunamadı.")
 
@@ -545,44 +320,30 @@ try:
     elif page == "Girdiğiniz Filme Göre Öneriler":
         movie_title = st.text_input("Bir film ismi girin (örneğin, Inception, Deadpool, Tosun Paşa):")
         if movie_title:
+            show_suggestions(engine.suggest('title', movie_title, limit=5))
             try:
-                recommendations = content_based_recommender(movie_title, df)
+                recommendations = engine.content(movie_title)
                 if recommendations.empty:
                     st.write(f"'{movie_title}' ile ilgili öneri bulunamadı.")
                 else:
                     st.write(f"'{movie_title}' benzeri filmler:")
-                    for _, row in recommendations.iterrows():
-                        st.write(f"**{row['Film Adı']}** (IMDB Rating: {row['IMDB Rating']:.1f})")
-                        if row['Poster URL'] and row['Poster URL'] != 'Poster bulunamadı':
-                            st.image(row['Poster URL'], width=500)
-                        else:
-                            st.write(" ")
-                        if row['Overview'] != 'Özet bulunamadı':
-                            translated_overview = translate_text(row['Overview'], dest_language='tr')
-                            st.write(f"**Özet:** {translated_overview}")
-                        else:
-                            st.write("Özet bulunamadı.")
+                    recommendations = recommendations.rename(columns={
+                        'Film Adı': 'title', 'IMDB Rating': 'averageRating', 'Poster URL': 'poster_url',
+                        'Overview': 'overview'}).replace({'poster_url': {'Poster bulunamadı': None},
+                                                         'overview': {'Özet bulunamadı': None}})
+                    show_results(recommendations, f"content:{movie_title}")
             except Exception as e:
                 st.error(f"Bir hata oluştu: {e}")
 
 
     elif page == "Anahtar Kelimelere Göre":
         keyword = st.text_input("Bir kelime girin (örneğin, Butterfly):")
+        semantic = st.checkbox("Anlamsal arama (benzer anlamlı özetleri de bul)")
         if keyword:
-            recommendations = keyword_based_recommender(keyword, df)
+            recommendations = engine.semantic(keyword) if semantic else engine.keyword(keyword)
             if isinstance(recommendations, pd.DataFrame) and not recommendations.empty:
                 st.write(f"'{keyword}' ile ilgili önerilen filmler:")
-                for _, row in recommendations.iterrows():
-                    st.write(f"**{row['title']}** (IMDB Rating: {row['averageRating']:.1f})")  
-                    if row['poster_url']:
-                        st.image(row['poster_url'], width=500) 
-                    else:
-                        st.write(" ")
-                    if row['overview']:
-                        translated_overview = translate_text(row['overview'], dest_language='tr')
-                        st.write(f"**Özet:** {translated_overview}")
-                    else:
-                        st.write("Özet bulunamadı.")  
+                show_results(recommendations, f"{'semantic' if semantic else 'keyword'}:{keyword}")
             else:
                 st.write(f"'{keyword}' ile ilgili öneri bulunamadı.")
 
@@ -592,25 +353,45 @@ try:
         st.write(f"Seçenekler : mutlu,üzgün, maceracı, korkutucu, heyecanlı, rahatlamış, meraklı, nostaljik, ilham verici, romantik, düşünceli, komik, karanlık, moral verici, gergin, büyülü")
         st.write(f"Options : happy, sad, adventurous, scary, excited, relaxed, curious, nostalgic, inspired, romantic, thoughtful, funny, dark, uplifting, tense, magical")
         if mood:
-            mood_in_english = mood_translation.get(mood.lower(), mood.lower())
-            recommendations = mood_based_recommender(mood_in_english, df)   
+            recommendations = engine.mood(mood)   
             if isinstance(recommendations, pd.DataFrame) and not recommendations.empty:
                 st.write(f"'{mood}' ruh hali için önerilen filmler:")
-                for _, row in recommendations.iterrows():
-                    st.write(f"**{row['title']}** (IMDB Rating: {row['averageRating']:.1f})") 
-                    if row['poster_url']:
-                        st.image(row['poster_url'], width=500)  
-                    else:
-                        st.write(" ") 
-                    if row['overview']:
-                        translated_overview = translate_text(row['overview'], dest_language='tr')
-                        st.write(f"**Özet:** {translated_overview}")
-                    else:
-                        st.write("Özet bulunamadı.")
+                show_results(recommendations, f"mood:{mood}")
             else:
                 st.write(f"'{mood}' ruh hali için öneri bulunamadı.")
     
 
+    elif page == "Karma Öneri":
+        st.write("Ölçütleri birleştirin, örneğin: karanlık + gerilim + Se7en + David Fincher / Combine any of the criteria below")
+        hybrid_mood = st.selectbox("Ruh hali / Mood:", [""] + sorted(mood_translation))
+        hybrid_genres = st.multiselect("Türler / Genres:", engine.genres)
+        hybrid_director = st.text_input("Yönetmen / Director:")
+        hybrid_cast = st.text_input("Oyuncular (virgülle ayırın) / Cast (comma separated):")
+        hybrid_title = st.text_input("Benzer film / Similar to:")
+        hybrid_keywords = st.text_input("Anahtar kelimeler / Keywords:")
+        cast_names = [name.strip() for name in hybrid_cast.split(',') if name.strip()]
+        if hybrid_mood or hybrid_genres or hybrid_director or cast_names or hybrid_title or hybrid_keywords:
+            recommendations = engine.hybrid(mood=hybrid_mood or None, genres=hybrid_genres,
+                                            director=hybrid_director or None, cast=cast_names,
+                                            title=hybrid_title or None, keywords=hybrid_keywords or None)
+            if isinstance(recommendations, pd.DataFrame) and not recommendations.empty:
+                st.write("Ölçütlerinize göre önerilen filmler:")
+                show_results(recommendations, 'hybrid')
+            else:
+                st.write("Bu ölçütlerle öneri bulunamadı.")
+
+
+    elif page == "Sana Özel":
+        profile = taste_profile()
+        recommendations = engine.personal(profile)
+        if isinstance(recommendations, pd.DataFrame):
+            st.write(f"Özetini açtığınız {len(profile.seen)} filme göre öneriler:")
+            show_results(recommendations, 'personal')
+            st.button("Tercihleri sıfırla", on_click=lambda: st.session_state.update({'taste': TasteProfile()}))
+        else:
+            st.write(recommendations)
+
+
     elif page == "Hakkımızda":
         st.title("Hakkımızda")
         st.write("""
@@ -628,5 +409,45 @@ try:
         
         **Amacımız:** I.N.K.A. ile herkes için doğru filmi bulmak ve keyifli bir sinema deneyimi yaşatmak!""")
 
+    # Per-stage timings, cache hit rates and an on-demand profiler; requires INKA_ADMIN_TOKEN
+    elif page == "Yönetici":
+        st.title("Yönetici")
+        admin_token = os.environ.get('INKA_ADMIN_TOKEN')
+        if not admin_token:
+            st.info("Yönetici sayfası için INKA_ADMIN_TOKEN ortam değişkenini tanımlayın.")
+        elif st.text_input("Yönetici anahtarı", type="password") == admin_token:
+            st.subheader("Aşama süreleri (ms)")
+            summary = pd.DataFrame(metrics.summary())
+            if summary.empty:
+                st.write("Henüz ölçüm yok.")
+            else:
+                st.dataframe(summary.round(3), hide_index=True)
+
+            st.subheader("Hazırlık durumu")
+            st.dataframe(pd.DataFrame([{'bileşen': name, 'hazır': ready} for name, ready in readiness.items()]),
+                         hide_index=True)
+
+            st.subheader("Önbellek isabet oranları")
+            hit_rates = pd.DataFrame([{'önbellek': cache, 'isabet': hits, 'ıska': misses, 'oran': round(rate, 3)}
+                                      for cache, (hits, misses, rate) in metrics.hit_rates().items()])
+            if hit_rates.empty:
+                st.write("Henüz önbellek erişimi yok.")
+            else:
+                st.dataframe(hit_rates, hide_index=True)
+
+            with st.expander("Prometheus çıktısı"):
+                st.code(metrics.to_prometheus(), language="text")
+            if st.button("Sayaçları sıfırla"):
+                metrics.reset()
+
+            st.subheader("Profil")
+            kind = st.selectbox("Öneri motoru", ['simple', 'genre', 'director', 'cast', 'content', 'keyword',
+                                                 'semantic', 'mood'])
+            query = st.text_input("Sorgu (simple için boş bırakın)")
+            if st.button("Profille"):
+                method = getattr(engine.state, kind)
+                _, report = profile(method) if kind == 'simple' else profile(method, query)
+                st.code(report, language="text")
+
 except Exception as e:
     st.error(f"Bir hata oluştu: {e}")
@@ -0,0 +1,39 @@
+# Per-query caches are shared by the API's executor threads: evictions by one thread must not break another
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inka.indexes import WeightedRating
+
+
+@pytest.fixture
+def frequent_switches():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_weighted_rating_stats_under_eviction(frequent_switches):
+    rating = WeightedRating(pd.DataFrame({'numVotes': np.arange(100.0), 'averageRating': np.linspace(1, 9, 100)}))
+    rating.max_cached_stats = 4
+    subset = np.arange(50)
+    expected = rating.stats(subset, ('director', 0), 0.9)
+    errors = []
+
+    def run(seed):
+        try:
+            for key in np.random.default_rng(seed).integers(0, 8, 5000):
+                assert rating.stats(subset, ('director', int(key)), 0.9) == expected
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
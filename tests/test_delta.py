@@ -0,0 +1,145 @@
+# Delta upserts (ingest.merge_delta): which rows update a movie, which add one and which are rejected
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_catalog
+from inka.engine import InkaEngine
+from inka.ingest import merge_delta, parse_delta, read_snapshot, refresh_snapshot
+from inka.metrics import metrics
+from inka.pipeline import ingest_csv
+from inka.shared import publish
+
+CATALOG = """id,title,original_title,release_date,directors,genres,numVotes,averageRating
+1,Inception,Inception,2010-07-15,Christopher Nolan,"Action,Science Fiction",100,8.8
+2,Heat,Heat,1995-12-15,Michael Mann,"Crime,Drama",200,8.3
+"""
+
+
+def catalog():
+    return parse_delta(CATALOG.encode())
+
+
+# Synthetic catalog of n movies as ingest stores it
+def synthetic(tmp_path, n):
+    generate_catalog(n).to_csv(tmp_path / "synthetic.csv", index=False)
+    ingest_csv(str(tmp_path / "synthetic.csv"), str(tmp_path / "synthetic.parquet"), str(tmp_path / "index"), workers=1)
+    return read_snapshot(str(tmp_path / "synthetic.parquet"))
+
+
+def rejected(reason='title'):
+    return metrics.counters().get(('delta_rejected', (('reason', reason),)), 0)
+
+
+def test_new_movie_without_title_is_rejected():
+    before = rejected()
+    merged, rows, _ = merge_delta(catalog(), parse_delta(b"id,numVotes\n3,999\n"))
+    assert len(merged) == 2 and not len(rows)
+    assert rejected() == before + 1
+
+
+def test_new_movie_with_title_is_added():
+    merged, rows, _ = merge_delta(catalog(), parse_delta(b"id,title,numVotes\n3,Alien,999\n"))
+    assert merged['title'].tolist() == ['Inception', 'Heat', 'Alien']
+    assert rows.tolist() == [2]
+
+
+def test_known_id_without_title_is_updated():
+    merged, rows, _ = merge_delta(catalog(), parse_delta(b"id,numVotes\n2,999\n"))
+    assert merged['numVotes'].tolist() == [100, 999]
+    assert rows.tolist() == [1]
+    assert pd.notna(merged['title']).all()
+
+
+# A blank cell means "unchanged": it must not wipe the title, popularity, overview or genres of the movie
+def test_blank_cells_keep_values(tmp_path):
+    catalog = synthetic(tmp_path, 20)
+    delta = parse_delta(b"id,title,numVotes,popularity,overview,genres\n1,,5,,,\n")
+    merged, rows, _ = merge_delta(catalog, delta)
+    assert rows.tolist() == [0] and merged['numVotes'].iat[0] == 5
+    for column in ('title', 'popularity', 'overview'):
+        assert merged[column].iat[0] == catalog[column].iat[0], column
+    assert list(merged['genres'].iat[0]) == list(catalog['genres'].iat[0])
+
+
+# A fractional id would be truncated onto another movie, a missing one would turn the id column into floats
+@pytest.mark.parametrize('row', [b"1.5,X", b",Foo", b"abc,X"])
+def test_delta_with_invalid_id_is_rejected(row):
+    before = rejected('id')
+    with pytest.raises(ValueError, match="id"):
+        parse_delta(b"id,title\n2,Heat\n" + row + b"\n")
+    assert rejected('id') == before + 1
+
+
+@pytest.mark.parametrize('body', [b"id,title\n1,X,extra\n2,Y\n", b"id,title\n2,Y\n1,X,extra\n"])
+def test_delta_with_malformed_row_is_rejected(body):
+    before = rejected('malformed')
+    with pytest.raises(ValueError, match="bozuk"):
+        parse_delta(body)
+    assert rejected('malformed') == before + 1
+
+
+def test_delta_ids_are_integers():
+    assert parse_delta(b"id,title\n1.0,X\n 2 ,Y\n")['id'].tolist() == [1, 2]
+
+
+# Ingest collapses the 2nd and 3rd rows into the 1st one (most votes): their ids become aliases
+DUPLICATES = CATALOG + """3,Inception,Inception,2010-07-16,Christopher Nolan,"Action,Science Fiction",50,8.7
+4,Başlangıç,Inception,2010-07-15,,Action,10,8.6
+"""
+
+
+def test_ingest_records_aliases(tmp_path):
+    source = tmp_path / "movies.csv"
+    source.write_text(DUPLICATES, encoding="utf-8")
+    report = ingest_csv(str(source), str(tmp_path / "movies.parquet"), str(tmp_path / "index"), workers=1)
+    assert report['duplicates'] == 2 and report['aliases'] == {3: 1, 4: 1}
+    assert read_snapshot(str(tmp_path / "movies.parquet"))['id'].tolist() == [1, 2]
+
+
+def test_collapsed_id_updates_canonical_movie():
+    merged, rows, aliases = merge_delta(catalog(), parse_delta(b"id,numVotes\n3,999\n"), {3: 1})
+    assert len(merged) == 2 and rows.tolist() == [0]
+    assert merged['numVotes'].tolist() == [999, 200] and aliases == {3: 1}
+
+
+def test_delta_duplicate_becomes_alias():
+    delta = b"id,title,original_title,release_date,directors,numVotes\n7,Heat,Heat,1995-12-15,Michael Mann,300\n"
+    merged, rows, aliases = merge_delta(catalog(), parse_delta(delta))
+    assert len(merged) == 2 and rows.tolist() == [1] and aliases == {7: 2}
+    # A later delta keyed by the duplicate's id, without a title, still finds the movie
+    merged, rows, aliases = merge_delta(merged, parse_delta(b"id,numVotes\n7,400\n"), aliases)
+    assert len(merged) == 2 and merged['numVotes'].tolist() == [100, 400]
+
+
+def snapshot(tmp_path):
+    source = tmp_path / "movies.csv"
+    source.write_text(DUPLICATES, encoding="utf-8")
+    refresh_snapshot(str(source), str(tmp_path / "movies.parquet"), str(tmp_path / "movies.meta.json"), workers=1)
+    return str(tmp_path / "movies.parquet")
+
+
+# Two engines on one snapshot stand for two API workers: a delta one applies reaches the other and a restart
+def test_delta_is_persisted_to_snapshot(tmp_path):
+    path = snapshot(tmp_path)
+    first, second = (InkaEngine.from_snapshot(path, refresh=False, index_dir=str(tmp_path / "index"), path=path,
+                                              poll_interval=0) for _ in range(2))
+    assert first.apply_delta(parse_delta(b"id,numVotes\n3,999\n")) == 1
+    second.poll()
+    restarted = InkaEngine.from_snapshot(path, refresh=False, index_dir=str(tmp_path / "index"), path=path)
+    for engine in (first, second, restarted):
+        assert engine.catalog['numVotes'].tolist() == [999, 200]
+        assert engine.state.aliases == {3: 1, 4: 1}
+    # The second worker's delta builds on the first one's
+    second.apply_delta(parse_delta(b"id,title,numVotes\n5,Alien,10\n"))
+    first.poll()
+    assert first.catalog['title'].tolist() == ['Inception', 'Heat', 'Alien']
+
+
+def test_delta_is_published_to_shared_root(tmp_path):
+    root, index_dir = str(tmp_path / "shared"), str(tmp_path / "index")
+    publish(synthetic(tmp_path, 200), root, index_dir)
+    first, second = (InkaEngine.from_shared(root, index_dir, poll_interval=0) for _ in range(2))
+    first.apply_delta(parse_delta(b"id,numVotes\n1,123456\n"))
+    second.poll()
+    for engine in (first, second, InkaEngine.from_shared(root, index_dir)):
+        assert engine.catalog['numVotes'].iat[0] == 123456
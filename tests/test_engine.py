@@ -0,0 +1,32 @@
+# Engine wiring around the catalog state: stores and files that appear after startup
+import logging
+
+from benchmarks.synthetic import generate_catalog
+from inka.batch import run_batch
+from inka.engine import InkaEngine
+from inka.metrics import metrics
+from inka.pipeline import ingest_csv
+
+
+def precomputed_hits():
+    return metrics.counters().get(('cache_hits', (('cache', 'precomputed'),)), 0)
+
+
+# A store `python -m inka.batch` fills after startup is used without a restart; until then the
+# fallback to computing on request is logged
+def test_precomputed_store_built_after_startup(tmp_path, caplog):
+    path, index_dir = str(tmp_path / "movies.parquet"), str(tmp_path / "index")
+    generate_catalog(300).to_csv(tmp_path / "movies.csv", index=False)
+    ingest_csv(str(tmp_path / "movies.csv"), path, index_dir, workers=1)
+    with caplog.at_level(logging.INFO, logger='inka.engine'):
+        engine = InkaEngine.from_snapshot(path, refresh=False, index_dir=index_dir, path=path, poll_interval=0)
+        expected = engine.simple()
+        assert engine.store is None and "istek anında" in caplog.text
+
+        run_batch(path, index_dir, recommenders=['simple'], workers=1)
+        engine.poll()
+        assert engine.store is not None and "kullanılıyor" in caplog.text
+    engine.results.clear()
+    before = precomputed_hits()
+    assert engine.simple().equals(expected)
+    assert precomputed_hits() == before + 1
@@ -0,0 +1,16 @@
+# Hybrid ranking: match strength orders movies, the weighted rating only orders equal matches
+from inka.ingest import parse_delta
+from inka.recommenders import hybrid_recommender
+
+GENRES = ['Action', 'Crime', 'Drama', 'Horror', 'Mystery', 'Thriller']
+CATALOG = """id,title,genres,numVotes,averageRating,popularity,overview,poster_url
+1,All Six,"Action,Crime,Drama,Horror,Mystery,Thriller",1000,2.0,1,,
+2,Five High,"Action,Crime,Drama,Horror,Mystery",1000,9.8,1,,
+3,Five Low,"Action,Crime,Drama,Horror,Mystery",1000,3.0,1,,
+4,Other,Comedy,1000,8.0,1,,
+"""
+
+
+def test_more_matching_genres_outrank_a_better_rating():
+    recommendations = hybrid_recommender(parse_delta(CATALOG.encode()), genres=GENRES)
+    assert recommendations['title'].tolist() == ['All Six', 'Five High', 'Five Low']
@@ -0,0 +1,102 @@
+# Deltas applied incrementally (CatalogState.updated) must give the results of a fresh build of the
+# merged catalog, for every index the delta patches or shares.
+#
+#   python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import GENRES, generate_catalog
+from inka.engine import INDEX_COLUMNS, CatalogState
+from inka.indexes import combined_text
+from inka.ingest import parse_delta, read_snapshot
+from inka.pipeline import ingest_csv
+
+ROWS = 3000
+
+
+@pytest.fixture(scope='module')
+def catalog(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('catalog')
+    generate_catalog(ROWS, seed=1).to_csv(workdir / "movies.csv", index=False)
+    ingest_csv(str(workdir / "movies.csv"), str(workdir / "movies.parquet"), str(workdir / "index"), workers=1)
+    return read_snapshot(str(workdir / "movies.parquet"))
+
+
+def delta_csv(frame):
+    return parse_delta(frame.to_csv(index=False).encode())
+
+
+def top_voted(catalog, n):
+    return catalog.sort_values('numVotes', ascending=False).head(n)
+
+
+# Each delta touches different columns, so different indexes are shared, patched or rebuilt
+DELTAS = {
+    'genres': lambda c: delta_csv(top_voted(c, 200)[['id']].assign(genres='Western')),
+    'directors': lambda c: delta_csv(top_voted(c, 200)[['id']].assign(directors=c['directors'].dropna().iloc[0])),
+    'cast': lambda c: delta_csv(top_voted(c, 200)[['id']].assign(cast='Nuri Actor1,Zeynep Actor2')),
+    'votes': lambda c: delta_csv(c.sample(300, random_state=0)[['id']].assign(numVotes=1e6, averageRating=9.1)),
+    'popularity': lambda c: delta_csv(c.sample(300, random_state=1)[['id']].assign(popularity=1e4)),
+    'text': lambda c: delta_csv(c.sample(100, random_state=2)[['id']].assign(overview='ghost river storm',
+                                                                              keywords='ghost,river')),
+    'new': lambda c: delta_csv(generate_catalog(50, seed=7).assign(id=lambda d: d['id'] + 10 ** 6,
+                                                                   title=lambda d: 'New ' + d['title'])),
+}
+
+
+def warm(state):
+    for name in INDEX_COLUMNS:
+        state._build(name)
+    return state
+
+
+def results(state):
+    catalog = state.catalog
+    directors = catalog['directors'].dropna().value_counts().index[:5].astype(str)
+    titles = catalog['title'].iloc[[0, 10, 100, len(catalog) - 1]]
+    return {
+        'simple': state.simple(),
+        **{f"genre:{genre}": state.genre(genre) for genre in GENRES},
+        **{f"director:{name}": state.director(name)[1] for name in directors},
+        **{f"cast:{name}": state.cast(name) for name in ['Nuri Actor1', 'Zeynep Actor2', 'Mary', 'ctor2']},
+        **{f"mood:{mood}": state.mood(mood) for mood in ['happy', 'dark', 'scary']},
+        **{f"content:{title}": state.content(title) for title in titles},
+        **{f"suggest:{kind}": state.suggest(kind, query) for kind, query in
+           [('genre', 'dr'), ('director', 'chris'), ('cast', 'actor1'), ('title', 'movie 1'), ('title', 'new')]},
+        'keyword': state.keyword('ghost river'),
+        'semantic': state.semantic('ghost river storm'),
+        'personal': state.taste_index.features(0),
+    }
+
+
+def assert_same(incremental, fresh):
+    assert incremental.keys() == fresh.keys()
+    for key in fresh:
+        if isinstance(fresh[key], pd.DataFrame):
+            pd.testing.assert_frame_equal(incremental[key], fresh[key], obj=key)
+        else:
+            assert incremental[key] == fresh[key], key
+
+
+@pytest.mark.parametrize('kind', list(DELTAS))
+def test_incremental_matches_fresh(catalog, tmp_path, kind):
+    delta = DELTAS[kind](catalog)
+    state = warm(CatalogState(catalog, str(tmp_path)))
+    # Fill the per-query caches (weighted rating stats, genre orderings) the next state may inherit
+    results(state)
+    updated = state.updated(delta)
+    fresh = warm(CatalogState(updated.catalog, str(tmp_path)))
+
+    incremental, expected = results(updated), results(fresh)
+    if 'overview' in delta.columns or len(updated.catalog) > len(catalog):
+        # Patched text indexes keep the fitted vocabulary and IDF weights until the next full load:
+        # the changed rows must be exactly their re-vectorized text
+        rows = np.flatnonzero(updated.catalog['id'].isin(delta['id']).to_numpy())
+        patched = updated.tfidf_index.matrix[rows]
+        transformed = state.tfidf_index.vectorizer.transform(combined_text(updated.catalog.iloc[rows]))
+        assert abs(patched - transformed).max() < 1e-6
+        for key in ('keyword', 'semantic'):
+            del incremental[key], expected[key]
+    assert_same(incremental, expected)
+
@@ -0,0 +1,13 @@
+# Index lookups against the plain scans they replace
+import pandas as pd
+import pytest
+
+from inka.indexes import CastIndex
+
+CAST = [['Nuri Actor1', 'Zeynep Actor2'], ['Mary Actor1'], ['Agnès Jaoui', 'Ali Şen'], [], ['Al']]
+
+
+@pytest.mark.parametrize('query', ['ctor1', 'actor', 'a', 'al', 'l', 'ş', 'gnès jao', 'ry ac', 'zz', 'actor12'])
+def test_cast_substring_lookup_matches_scan(query):
+    index = CastIndex(pd.DataFrame({'cast': CAST}))
+    assert index.lookup(query, 'substring') == [i for i, name in enumerate(index.names) if query in name]
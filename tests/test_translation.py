@@ -0,0 +1,20 @@
+# A backend that hangs must not block the caller past the service timeout
+import threading
+
+from inka.translation import TranslationCache, TranslationService
+
+
+def test_translate_falls_back_to_text_on_timeout():
+    release = threading.Event()
+
+    def backend(text, dest):
+        release.wait()
+        return text.upper()
+
+    service = TranslationService(backend=backend, cache=TranslationCache(':memory:'), timeout=0.1)
+    assert service.translate("slow", 'tr') == "slow"
+    release.set()
+    service._executor.shutdown(wait=True)
+    # Cached once the backend answers
+    assert service.translate("slow", 'tr') == "SLOW"
+